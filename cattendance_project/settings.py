@@ -119,6 +119,74 @@ DATABASES = {
     )
 }
 
+# ===============================================
+# CACHE
+# ===============================================
+# In-process by default. Point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) so every
+# gunicorn worker sees the same active QR codes.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('CACHE_LOCATION', 'cattendance'),
+    }
+}
+
+# Dashboard template fragments are cached per user until that user's data
+# version changes; this only bounds how long an unchanged fragment is kept.
+# Fragments are only cached with a shared CACHE_BACKEND; 0 turns them off.
+FRAGMENT_CACHE_SECONDS = int(os.getenv('FRAGMENT_CACHE_SECONDS', str(12 * 60 * 60)))
+
+# ===============================================
+# QR TOKENS
+# ===============================================
+# When enabled, session QR codes carry an HMAC-signed token that rotates
+# every QR_TOKEN_ROTATE_SECONDS instead of the stored SessionQRCode.code.
+QR_TOKEN_MODE = os.getenv('QR_TOKEN_MODE', 'False') == 'True'
+QR_TOKEN_ROTATE_SECONDS = int(os.getenv('QR_TOKEN_ROTATE_SECONDS', '15'))
+
+# ===============================================
+# SCAN BUFFER
+# ===============================================
+# When enabled, mark_attendance acknowledges scans immediately and a
+# background flusher writes them in batches (dashboard_app/services/scan_buffer.py).
+# Requires a shared CACHE_BACKEND so end_session can drain scans taken by any
+# worker; the dashboard_app.E001 system check refuses to start without one.
+SCAN_BUFFER_MODE = os.getenv('SCAN_BUFFER_MODE', 'False') == 'True'
+SCAN_BUFFER_FLUSH_MS = int(os.getenv('SCAN_BUFFER_FLUSH_MS', '250'))
+SCAN_BUFFER_BATCH_SIZE = int(os.getenv('SCAN_BUFFER_BATCH_SIZE', '500'))
+
+# ===============================================
+# NETWORK POLICY
+# ===============================================
+# Comma-separated CIDRs. Students inside CAMPUS_NETWORKS may scan even when
+# they are on a different subnet than the teacher. X-Forwarded-For is only
+# trusted when the direct peer is in TRUSTED_PROXIES. The default only trusts
+# a reverse proxy on the same host; add your load balancer's range behind one.
+CAMPUS_NETWORKS = [n for n in os.getenv('CAMPUS_NETWORKS', '').split(',') if n.strip()]
+TRUSTED_PROXIES = [n for n in os.getenv('TRUSTED_PROXIES', '127.0.0.1/32,::1/128').split(',') if n.strip()]
+# Size of the subnet around the teacher's address that a session accepts
+SESSION_NETWORK_PREFIX_V4 = int(os.getenv('SESSION_NETWORK_PREFIX_V4', '24'))
+SESSION_NETWORK_PREFIX_V6 = int(os.getenv('SESSION_NETWORK_PREFIX_V6', '64'))
+
+# The teacher session page polls for attendance changes every
+# ATTENDANCE_FEED_POLL_SECONDS. ATTENDANCE_FEED_MAX_WAIT (seconds) lets a poll
+# wait for a change instead (long-poll). Keep it 0 with the default sync
+# gunicorn worker: a waiting request occupies the whole worker and student
+# scans queue behind it. Raise it only under threaded/async workers or ASGI.
+ATTENDANCE_FEED_MAX_WAIT = int(os.getenv('ATTENDANCE_FEED_MAX_WAIT', '0'))
+ATTENDANCE_FEED_POLL_SECONDS = int(os.getenv('ATTENDANCE_FEED_POLL_SECONDS', '3'))
+
+# ===============================================
+# MEDIA (EXPORT FILES)
+# ===============================================
+# Export jobs built by `manage.py run_export_jobs` are written here and served
+# to their owner through the download_export view, never as public media.
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+# A running export whose worker has not reported progress for this long is
+# treated as abandoned (the worker died) and marked failed.
+EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', '600'))
+
 # ===============================================
 # PASSWORD VALIDATION
 # ===============================================
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.checks import Error, Tags, register
 
 
 class DashboardAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard_app'
+
+
+@register(Tags.caches)
+def check_scan_buffer_cache(app_configs, **kwargs):
+    # Scans buffered by one worker would be invisible to the worker ending the session
+    from dashboard_app.services import cache_versions
+
+    if getattr(settings, 'SCAN_BUFFER_MODE', False) and not cache_versions.is_shared():
+        return [Error(
+            "SCAN_BUFFER_MODE requires a shared CACHE_BACKEND.",
+            hint="Use a cache every worker can reach (e.g. Redis), or turn SCAN_BUFFER_MODE off.",
+            id='dashboard_app.E001',
+        )]
+    return []
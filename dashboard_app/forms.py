@@ -1,12 +1,20 @@
 from django import forms
 from .models import ClassSession
+from .services import network_policy
 from auth_app.models import StudentProfile, TeacherProfile
 import re
 
 class ClassSessionForm(forms.ModelForm):
     class Meta:
         model = ClassSession
-        fields = ["schedule_day"]
+        fields = ["schedule_day", "allowed_networks"]
+        labels = {"allowed_networks": "Extra networks"}
+        widgets = {
+            "allowed_networks": forms.TextInput(attrs={"placeholder": "Optional, e.g. 10.20.0.0/16"}),
+        }
+
+    def clean_allowed_networks(self):
+        return network_policy.normalize_networks(self.cleaned_data.get("allowed_networks"))
 
 
 class StudentProfileEditForm(forms.ModelForm):
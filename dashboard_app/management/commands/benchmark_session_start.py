@@ -0,0 +1,79 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from dashboard_app.management import seeding
+from dashboard_app.models import Enrollment, ClassSession, SessionAttendance
+from dashboard_app.services import roster_cache, session_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Time session start for classes of several sizes, comparing the old "
+        "per-student get_or_create loop with bulk roster materialization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='50,500,2000', help='Comma-separated class sizes to benchmark.')
+        parser.add_argument('--repeats', type=int, default=3, help='Sessions started per size and strategy; the best run is reported.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of deleting it.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if not sizes or min(sizes) < 1 or options['repeats'] < 1:
+            raise CommandError("--sizes and --repeats must be positive.")
+
+        run_id = uuid.uuid4().hex[:6]
+        self.stdout.write(f"Seeding {max(sizes)} students (run {run_id})...")
+        teacher_user, teacher, students = seeding.seed_people('bench', 'BS', run_id, max(sizes))
+
+        rows = []
+        try:
+            for size in sizes:
+                class_obj, schedule = seeding.seed_class(
+                    teacher, students[:size], code=f"BS{run_id}{size}".upper(), title='Session Start Benchmark',
+                    academic_year='benchmark', semester=run_id, section=str(size),
+                )
+                for name, start in (('get_or_create', self.start_loop), ('bulk', self.start_bulk)):
+                    runs = [self.measure(class_obj, schedule, start) for _ in range(options['repeats'])]
+                    ms, queries = min(runs)
+                    rows.append((size, name, ms, queries))
+        finally:
+            if not options['keep']:
+                seeding.delete_people(teacher_user, students)
+
+        self.stdout.write(self.style.SUCCESS(f"Session start benchmark (best of {options['repeats']})"))
+        self.stdout.write(f"  {'students':>8}  {'strategy':<14} {'ms':>10} {'queries':>8}")
+        for size, name, ms, queries in rows:
+            self.stdout.write(f"  {size:>8}  {name:<14} {ms:>10.1f} {queries:>8}")
+
+    def measure(self, class_obj, schedule, start):
+        roster_cache.invalidate(class_obj.id)
+        queries = 0
+
+        # Counted with a wrapper: the debug query log caps out on large rosters
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            session = ClassSession.objects.create(
+                class_obj=class_obj, schedule_day=schedule, status='ongoing', teacher_ip='127.0.0.1',
+            )
+            start(session)
+            elapsed = (time.perf_counter() - started) * 1000
+        session.delete()
+        return elapsed, queries
+
+    def start_loop(self, session):
+        # The per-student loop session creation used before bulk materialization
+        for e in Enrollment.objects.filter(class_obj=session.class_obj):
+            SessionAttendance.objects.get_or_create(session=session, student=e.student)
+
+    def start_bulk(self, session):
+        session_roster.materialize(session)
@@ -0,0 +1,163 @@
+import json
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from dashboard_app.management import seeding
+from dashboard_app.models import ClassSession, SessionAttendance, SessionQRCode
+from dashboard_app.services import qr_cache, scan_buffer
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a class with N enrolled students and an ongoing session with an active QR code, "
+        "fire concurrent scans at mark_attendance, and report throughput, latency, "
+        "errors by status and DB queries per scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500, help='Number of enrolled students to seed.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Number of scanning threads.')
+        parser.add_argument('--repeats', type=int, default=1, help='Scans per student (repeats exercise the already-marked path).')
+        parser.add_argument('--save', metavar='FILE', help='Write the report as JSON, e.g. to record a baseline.')
+        parser.add_argument('--baseline', metavar='FILE', help='Compare against a report saved with --save.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of deleting it.')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['concurrency'] < 1 or options['repeats'] < 1:
+            raise CommandError("--students, --concurrency and --repeats must be positive.")
+
+        run_id = uuid.uuid4().hex[:6]
+        self.stdout.write(f"Seeding {options['students']} students (run {run_id})...")
+        teacher_user, session, qr, students = self.seed(run_id, options['students'])
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                report = self.fire(session, qr, students, options['concurrency'], options['repeats'])
+            report['present_rows'] = SessionAttendance.objects.filter(session=session, is_present=True).count()
+        finally:
+            if not options['keep']:
+                seeding.delete_people(teacher_user, students)
+                qr_cache.invalidate_session(session.id)
+
+        self.print_report(report)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                self.print_comparison(report, json.load(f))
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report saved to {options['save']}")
+
+    def seed(self, run_id, count):
+        teacher_user, teacher, profiles = seeding.seed_people('loadtest', 'LT', run_id, count)
+        class_obj, schedule = seeding.seed_class(
+            teacher, profiles, code=f"LT{run_id}".upper(), title='Scan Load Test',
+            academic_year='load-test', semester=run_id, section='L1',
+        )
+
+        # REMOTE_ADDR of the test client is 127.0.0.1, so the network check passes
+        session = ClassSession.objects.create(
+            class_obj=class_obj, schedule_day=schedule, status='ongoing', teacher_ip='127.0.0.1',
+        )
+        SessionAttendance.objects.bulk_create(
+            [SessionAttendance(session=session, student=p) for p in profiles], batch_size=seeding.BATCH_SIZE
+        )
+        qr = SessionQRCode.generate_for_session(session, validity_minutes=30)
+        qr_cache.store(qr)
+        return teacher_user, session, qr, profiles
+
+    def fire(self, session, qr, students, concurrency, repeats):
+        url = reverse('dashboard_student:mark_attendance', args=[qr.code])
+
+        self.stdout.write("Logging in clients...")
+        clients = []
+        for profile in students:
+            client = Client()
+            client.force_login(profile.user)
+            clients.append(client)
+
+        def scan(client):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                try:
+                    status = client.get(url).status_code
+                except Exception as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - started
+            return status, elapsed, len(ctx)
+
+        jobs = [c for _ in range(repeats) for c in clients]
+        self.stdout.write(f"Firing {len(jobs)} scans with {concurrency} threads...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(scan, jobs))
+        wall = time.perf_counter() - started
+
+        if scan_buffer.enabled():
+            flush_started = time.perf_counter()
+            scan_buffer.flush(session.id, wait=True)
+            flush_seconds = time.perf_counter() - flush_started
+        else:
+            flush_seconds = None
+
+        latencies = sorted(r[1] * 1000 for r in results)
+        statuses = Counter(str(r[0]) for r in results)
+        return {
+            'scans': len(results),
+            'students': len(students),
+            'concurrency': concurrency,
+            'wall_seconds': round(wall, 3),
+            'throughput_per_second': round(len(results) / wall, 1) if wall else 0,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2) if latencies else 0,
+            },
+            'status_counts': dict(statuses),
+            'queries_per_scan': round(sum(r[2] for r in results) / len(results), 2) if results else 0,
+            'buffer_flush_seconds': round(flush_seconds, 3) if flush_seconds is not None else None,
+        }
+
+    def print_report(self, report):
+        latency = report['latency_ms']
+        self.stdout.write(self.style.SUCCESS("Scan burst report"))
+        self.stdout.write(f"  scans:            {report['scans']} ({report['students']} students, {report['concurrency']} threads)")
+        self.stdout.write(f"  wall time:        {report['wall_seconds']} s")
+        self.stdout.write(f"  throughput:       {report['throughput_per_second']} scans/s")
+        self.stdout.write(f"  latency (ms):     p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+        self.stdout.write(f"  status counts:    {report['status_counts']}")
+        self.stdout.write(f"  queries/scan:     {report['queries_per_scan']} (includes session and user lookups)")
+        self.stdout.write(f"  present rows:     {report['present_rows']}")
+        if report['buffer_flush_seconds'] is not None:
+            self.stdout.write(f"  buffer drain:     {report['buffer_flush_seconds']} s")
+
+    def print_comparison(self, report, baseline):
+        def delta(current, previous):
+            if not previous:
+                return "n/a"
+            return f"{(current - previous) / previous * 100:+.1f}%"
+
+        self.stdout.write(self.style.SUCCESS("Compared with baseline"))
+        self.stdout.write(f"  throughput:   {baseline['throughput_per_second']} -> {report['throughput_per_second']} "
+                          f"({delta(report['throughput_per_second'], baseline['throughput_per_second'])})")
+        for key in ('p50', 'p95', 'p99'):
+            before, after = baseline['latency_ms'][key], report['latency_ms'][key]
+            self.stdout.write(f"  {key} latency:  {before} -> {after} ms ({delta(after, before)})")
+        self.stdout.write(f"  queries/scan: {baseline['queries_per_scan']} -> {report['queries_per_scan']} "
+                          f"({delta(report['queries_per_scan'], baseline['queries_per_scan'])})")
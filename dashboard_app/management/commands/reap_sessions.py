@@ -0,0 +1,45 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from dashboard_app.services import session_reaper
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Close ongoing class sessions whose scheduled time is over, across all classes, "
+        "and mark their unmarked students absent. Run once (e.g. from cron) or with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running, reaping every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between passes in --loop mode.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['interval'] < 1:
+            raise CommandError("--interval must be positive.")
+
+        if not options['loop']:
+            self.report(session_reaper.reap())
+            return
+
+        self.stdout.write(f"Reaping overdue sessions every {options['interval']} s (Ctrl+C to stop)...")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self.report(session_reaper.reap())
+                except Exception:
+                    logger.exception("Session reaper pass failed; will retry")
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+
+    def report(self, closed):
+        if closed:
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} overdue session(s)."))
+        elif self.verbosity > 1:
+            self.stdout.write("No overdue sessions.")
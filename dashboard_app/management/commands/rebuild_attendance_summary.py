@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dashboard_app.models import Class
+from dashboard_app.services import attendance_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every enrollment's attendance counters (sessions, present, absent, last attended) "
+        "from the attendance rows. Safe to run at any time; fixes counters that have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_ids', type=int, action='append', default=[],
+                            help='Only rebuild this class id (repeatable).')
+
+    def handle(self, *args, **options):
+        classes = Class.objects.order_by('id')
+        if options['class_ids']:
+            classes = classes.filter(id__in=options['class_ids'])
+            missing = set(options['class_ids']) - set(classes.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"No class with id {', '.join(map(str, sorted(missing)))}.")
+
+        total = 0
+        # One short transaction per class keeps row locks brief on a live database
+        for class_id in classes.values_list('id', flat=True).iterator():
+            with transaction.atomic():
+                updated = attendance_summary.recount_class(class_id)
+            total += updated
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Class {class_id}: {updated} enrollment(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Recounted {total} enrollment(s)."))
@@ -0,0 +1,45 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from dashboard_app.services import export_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build queued attendance export jobs (zips of CSVs) into MEDIA_ROOT. "
+        "Run once (e.g. from cron) or with --loop as a background worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running, polling for jobs every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls in --loop mode.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['interval'] < 1:
+            raise CommandError("--interval must be positive.")
+
+        if not options['loop']:
+            self.report(export_jobs.run_pending())
+            return
+
+        self.stdout.write(f"Polling for export jobs every {options['interval']} s (Ctrl+C to stop)...")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self.report(export_jobs.run_pending())
+                except Exception:
+                    logger.exception("Export worker pass failed; will retry")
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+
+    def report(self, handled):
+        if handled:
+            self.stdout.write(self.style.SUCCESS(f"Processed {handled} export job(s)."))
+        elif self.verbosity > 1:
+            self.stdout.write("No queued export jobs.")
@@ -0,0 +1,66 @@
+from datetime import time as dt_time
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from auth_app.models import User, StudentProfile, TeacherProfile
+from dashboard_app.models import Class, ClassSchedule, Enrollment
+
+# Throwaway data for the benchmark and load-test commands. Every account is
+# named after the command and a per-run id, so runs never collide and
+# delete_people() removes everything a run created (classes, sessions and
+# attendance cascade from the users).
+BATCH_SIZE = 500
+
+
+def seed_people(label, prefix, run_id, count):
+    """
+    Create one teacher and `count` students with unusable passwords.
+
+    Emails are `<label>-<run_id>-...@example.com`; employee and student ids
+    start with `prefix`. Returns (teacher_user, teacher, student_profiles);
+    each profile carries its `user`.
+    """
+    password = make_password(None)
+    teacher_user = User.objects.bulk_create([User(
+        username=f"{label}-{run_id}-teacher@example.com",
+        email=f"{label}-{run_id}-teacher@example.com",
+        password=password,
+        user_type='teacher',
+    )])[0]
+    teacher = TeacherProfile.objects.create(user=teacher_user, employee_id=f"{prefix}-{run_id}")
+
+    # bulk_create skips the post_save signal, so profiles are created explicitly
+    users = User.objects.bulk_create([
+        User(
+            username=f"{label}-{run_id}-{i}@example.com",
+            email=f"{label}-{run_id}-{i}@example.com",
+            password=password,
+            first_name=label.title(),
+            last_name=f"Student {i}",
+            user_type='student',
+        ) for i in range(count)
+    ], batch_size=BATCH_SIZE)
+    profiles = StudentProfile.objects.bulk_create([
+        StudentProfile(user=u, student_id_number=f"{prefix}{run_id}{i}") for i, u in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    return teacher_user, teacher, profiles
+
+
+def seed_class(teacher, profiles, **fields):
+    """
+    Create a class with `fields`, a schedule that meets all day today (so a
+    session can start right away) and an enrollment for every profile.
+    Returns (class_obj, schedule).
+    """
+    class_obj = Class.objects.create(teacher=teacher, **fields)
+    schedule = ClassSchedule.objects.create(
+        class_obj=class_obj, day_of_week=timezone.localtime().strftime('%A'),
+        start_time=dt_time(0, 0), end_time=dt_time(23, 59),
+    )
+    Enrollment.objects.bulk_create([Enrollment(class_obj=class_obj, student=p) for p in profiles], batch_size=BATCH_SIZE)
+    return class_obj, schedule
+
+
+def delete_people(teacher_user, profiles):
+    # StudentProfile shares its primary key with User
+    User.objects.filter(pk__in=[p.pk for p in profiles]).delete()
+    teacher_user.delete()
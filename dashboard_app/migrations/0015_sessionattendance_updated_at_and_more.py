@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0005_alter_teacherprofile_employee_id'),
+        ('dashboard_app', '0014_classsession_teacher_ip'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionattendance',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='sessionattendance',
+            index=models.Index(fields=['session', 'updated_at'], name='dashboard_a_session_27478a_idx'),
+        ),
+    ]
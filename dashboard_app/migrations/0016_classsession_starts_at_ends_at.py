@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:52
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_meeting_window(apps, schema_editor):
+    ClassSession = apps.get_model('dashboard_app', 'ClassSession')
+    tz = timezone.get_current_timezone()
+    sessions = ClassSession.objects.filter(ends_at__isnull=True).select_related('schedule_day')
+    batch = []
+    for session in sessions.iterator(chunk_size=1000):
+        schedule = session.schedule_day
+        session.starts_at = timezone.make_aware(datetime.combine(session.date, schedule.start_time), tz)
+        session.ends_at = timezone.make_aware(datetime.combine(session.date, schedule.end_time), tz)
+        batch.append(session)
+        if len(batch) >= 1000:
+            ClassSession.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+            batch = []
+    if batch:
+        ClassSession.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0015_sessionattendance_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(fields=['status', 'ends_at'], name='dashboard_a_status_24c5d7_idx'),
+        ),
+        migrations.RunPython(backfill_meeting_window, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:54
+
+from django.db import migrations, models
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def backfill_timetable(apps, schema_editor):
+    ClassSchedule = apps.get_model('dashboard_app', 'ClassSchedule')
+    batch = []
+    for schedule in ClassSchedule.objects.filter(weekday__isnull=True).iterator(chunk_size=1000):
+        schedule.weekday = WEEKDAYS.index(schedule.day_of_week)
+        day_start = schedule.weekday * 24 * 60
+        schedule.start_minute = day_start + schedule.start_time.hour * 60 + schedule.start_time.minute
+        schedule.end_minute = day_start + schedule.end_time.hour * 60 + schedule.end_time.minute
+        batch.append(schedule)
+        if len(batch) >= 1000:
+            ClassSchedule.objects.bulk_update(batch, ['weekday', 'start_minute', 'end_minute'])
+            batch = []
+    if batch:
+        ClassSchedule.objects.bulk_update(batch, ['weekday', 'start_minute', 'end_minute'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0016_classsession_starts_at_ends_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classschedule',
+            name='end_minute',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='classschedule',
+            name='start_minute',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='classschedule',
+            name='weekday',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='classschedule',
+            index=models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='dashboard_a_weekday_1b3c05_idx'),
+        ),
+        migrations.RunPython(backfill_timetable, migrations.RunPython.noop),
+    ]
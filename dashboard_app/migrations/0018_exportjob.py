@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0005_alter_teacherprofile_employee_id'),
+        ('dashboard_app', '0017_classschedule_timetable_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(blank=True, max_length=15, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_steps', models.PositiveIntegerField(default=0)),
+                ('completed_steps', models.PositiveIntegerField(default=0)),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='auth_app.teacherprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='dashboard_a_status_f70274_idx')],
+            },
+        ),
+    ]
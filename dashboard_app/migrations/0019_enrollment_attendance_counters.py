@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:08
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Class = apps.get_model('dashboard_app', 'Class')
+    ClassSession = apps.get_model('dashboard_app', 'ClassSession')
+    Enrollment = apps.get_model('dashboard_app', 'Enrollment')
+    SessionAttendance = apps.get_model('dashboard_app', 'SessionAttendance')
+
+    def count_by(queryset, group):
+        counted = queryset.order_by().values(group).annotate(n=Count('id')).values('n')[:1]
+        return Coalesce(Subquery(counted), Value(0), output_field=IntegerField())
+
+    marks = SessionAttendance.objects.filter(
+        session__class_obj_id=OuterRef('class_obj_id'), student_id=OuterRef('student_id'),
+    )
+    counters = {
+        'session_count': count_by(ClassSession.objects.filter(class_obj_id=OuterRef('class_obj_id')), 'class_obj_id'),
+        'present_count': count_by(marks.filter(is_present=True), 'student_id'),
+        'absent_count': count_by(marks.filter(is_present=False), 'student_id'),
+        'last_attended_at': Subquery(
+            marks.filter(is_present=True).order_by().values('student_id').annotate(last=Max('timestamp')).values('last')[:1]
+        ),
+    }
+    for class_id in Class.objects.values_list('id', flat=True).iterator():
+        Enrollment.objects.filter(class_obj_id=class_id).update(**counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0018_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='absent_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_attended_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='present_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
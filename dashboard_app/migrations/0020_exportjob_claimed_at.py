@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0019_enrollment_attendance_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
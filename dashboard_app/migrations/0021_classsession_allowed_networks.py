@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:41
+
+import dashboard_app.services.network_policy
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0020_exportjob_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='allowed_networks',
+            field=models.CharField(blank=True, default='', max_length=500, validators=[dashboard_app.services.network_policy.validate_networks]),
+        ),
+    ]
@@ -4,7 +4,8 @@ import csv
 from django.http import HttpResponse
 from django.utils import timezone
 import uuid
-from datetime import timedelta
+from datetime import datetime, timedelta
+from dashboard_app.services import network_policy, qr_cache
 
 
 class Class(models.Model):
@@ -23,6 +24,11 @@ class Class(models.Model):
         return f"{self.code} - {self.title}"
 
 
+# Index in this list == datetime.weekday()
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MINUTES_PER_DAY = 24 * 60
+
+
 class ClassSchedule(models.Model):
     class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='schedules')
     day_of_week = models.CharField(
@@ -39,15 +45,47 @@ class ClassSchedule(models.Model):
     )
     start_time = models.TimeField()
     end_time = models.TimeField()
+    # Timetable position derived in save(); minutes are counted from Monday 00:00
+    weekday = models.PositiveSmallIntegerField(null=True, editable=False)
+    start_minute = models.PositiveIntegerField(null=True, editable=False)
+    end_minute = models.PositiveIntegerField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['weekday', 'start_minute', 'end_minute']),
+        ]
 
     def __str__(self):
         return f"{self.class_obj.code} - {self.day_of_week} ({self.start_time}-{self.end_time})"
 
+    def save(self, *args, **kwargs):
+        # Views pass the raw "HH:MM" strings from the form, so normalize first
+        self.start_time = self._meta.get_field('start_time').to_python(self.start_time)
+        self.end_time = self._meta.get_field('end_time').to_python(self.end_time)
+        self.weekday = WEEKDAYS.index(self.day_of_week)
+        day_start = self.weekday * MINUTES_PER_DAY
+        self.start_minute = day_start + self.start_time.hour * 60 + self.start_time.minute
+        self.end_minute = day_start + self.end_time.hour * 60 + self.end_time.minute
+        super().save(*args, **kwargs)
+
+    def meeting_window(self, date):
+        """Timezone-aware (starts_at, ends_at) of this schedule's meeting on `date`."""
+        tz = timezone.get_current_timezone()
+        return (
+            timezone.make_aware(datetime.combine(date, self.start_time), tz),
+            timezone.make_aware(datetime.combine(date, self.end_time), tz),
+        )
+
 
 class Enrollment(models.Model):
     class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='enrollments')
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Attendance counters kept current by dashboard_app/services/attendance_summary.py
+    session_count = models.PositiveIntegerField(default=0, editable=False)
+    present_count = models.PositiveIntegerField(default=0, editable=False)
+    absent_count = models.PositiveIntegerField(default=0, editable=False)
+    last_attended_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('class_obj', 'student')
@@ -55,6 +93,30 @@ class Enrollment(models.Model):
     def __str__(self):
         return f"{self.student.user.email} in {self.class_obj.code}"
 
+    @property
+    def unmarked_count(self):
+        return max(self.session_count - self.present_count - self.absent_count, 0)
+
+    @property
+    def attendance_rate(self):
+        return round((self.present_count / self.session_count) * 100, 2) if self.session_count > 0 else 0
+
+class ClassSessionQuerySet(models.QuerySet):
+    # Range filters on the denormalized meeting window, served by the (status, ends_at) index
+
+    def overdue(self, now=None):
+        """Ongoing sessions whose scheduled meeting is already over."""
+        return self.filter(status="ongoing", ends_at__lt=now or timezone.now())
+
+    def live(self, now=None):
+        """Ongoing sessions whose scheduled meeting has not ended yet."""
+        return self.filter(status="ongoing", ends_at__gte=now or timezone.now())
+
+    def between(self, start, end):
+        """Sessions whose meeting starts within [start, end), e.g. this week."""
+        return self.filter(starts_at__gte=start, starts_at__lt=end)
+
+
 class ClassSession(models.Model):
     class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="sessions")
     schedule_day = models.ForeignKey(ClassSchedule, on_delete=models.CASCADE)
@@ -65,10 +127,29 @@ class ClassSession(models.Model):
         default="ongoing",
     )
     teacher_ip = models.CharField(max_length=45, blank=True, null=True)  # Store teacher's IP when session starts
+    # Extra CIDRs this session accepts scans from besides the teacher's subnet (comma-separated)
+    allowed_networks = models.CharField(
+        max_length=500, blank=True, default='', validators=[network_policy.validate_networks]
+    )
+    # Scheduled meeting window, copied from schedule_day when the session is created
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ClassSessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'ends_at']),
+        ]
 
     def __str__(self):
         return f"{self.class_obj.code} - {self.schedule_day.day_of_week} ({self.date})"
 
+    def save(self, *args, **kwargs):
+        if self.ends_at is None and self.schedule_day_id:
+            self.starts_at, self.ends_at = self.schedule_day.meeting_window(self.date or timezone.localdate())
+        super().save(*args, **kwargs)
+
 class SessionAttendance(models.Model):
     session = models.ForeignKey('ClassSession', on_delete=models.CASCADE, related_name='attendances')
     student = models.ForeignKey('auth_app.StudentProfile', on_delete=models.CASCADE)
@@ -76,9 +157,13 @@ class SessionAttendance(models.Model):
     is_present = models.BooleanField(null=True, default=None)
     marked_via_qr = models.BooleanField(default=False)
     timestamp = models.DateTimeField(null=True, blank=True)  # Time when attendance was marked
+    updated_at = models.DateTimeField(auto_now=True, null=True)  # Cursor for the live attendance feed
 
     class Meta:
         unique_together = ('session', 'student')
+        indexes = [
+            models.Index(fields=['session', 'updated_at']),
+        ]
 
     def __str__(self):
         status = 'Present' if self.is_present is True else ('Absent' if self.is_present is False else 'Not Marked')
@@ -96,7 +181,8 @@ class SessionQRCode(models.Model):
 
     @staticmethod
     def generate_for_session(session, validity_minutes=5):
-        # Create or update QR code for session
+        # Create or update QR code for session; the previous code stops resolving
+        qr_cache.invalidate_session(session.id)
         code = uuid.uuid4().hex
         now = timezone.now()
         expires = now + timedelta(minutes=validity_minutes)
@@ -105,3 +191,39 @@ class SessionQRCode(models.Model):
             defaults={"code": code, "expires_at": expires, "qr_active": True}
         )
         return qr
+
+
+class ExportJob(models.Model):
+    # A zip of every CSV export for a teacher's classes, built off the request
+    # path by `manage.py run_export_jobs` (dashboard_app/services/export_jobs.py)
+    teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE, related_name='export_jobs')
+    academic_year = models.CharField(max_length=15, blank=True, null=True)  # None exports every class
+    status = models.CharField(
+        max_length=10,
+        choices=[("pending", "Pending"), ("running", "Running"), ("done", "Done"), ("failed", "Failed")],
+        default="pending",
+    )
+    total_steps = models.PositiveIntegerField(default=0)
+    completed_steps = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # re-stamped after each file while running
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Export {self.id} for {self.teacher.user.email} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of the export's files written so far."""
+        if self.status == 'done':
+            return 100
+        if not self.total_steps:
+            return 0
+        return int(self.completed_steps * 100 / self.total_steps)
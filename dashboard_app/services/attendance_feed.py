@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from dashboard_app.models import SessionAttendance
+from dashboard_app.services import cache_versions
+
+# Every write path bumps a per-session version in the cache, so a waiting
+# long-poll request can notice new changes without querying the database.
+VERSION_KEY = 'attendance:session:{}:version'
+VERSION_TIMEOUT = 6 * 60 * 60
+# Longest expected gap between stamping updated_at and committing the row
+CURSOR_OVERLAP = timedelta(seconds=5)
+
+
+def bump(session_id):
+    cache_versions.bump(VERSION_KEY.format(session_id), VERSION_TIMEOUT)
+
+
+def version(session_id):
+    return cache.get(VERSION_KEY.format(session_id), 0)
+
+
+def status_label(is_present):
+    if is_present is True:
+        return 'present'
+    if is_present is False:
+        return 'absent'
+    return ''
+
+
+def changes_since(session_id, since):
+    """
+    Return (changes, cursor) for rows of a session updated after `since`.
+
+    `cursor` is the newest updated_at seen, to be passed back as the next
+    `since`. `updated_at` is stamped before the writing transaction commits,
+    so a row can become visible after a later-stamped one has already moved
+    the cursor past it. Each read therefore reaches back CURSOR_OVERLAP
+    before `since`. Rows already delivered come back with the same
+    `updated_at`, and the client skips them by (student_id, updated_at).
+    Served by the (session, updated_at) index.
+    """
+    rows = (
+        SessionAttendance.objects
+        .filter(session_id=session_id, updated_at__gt=since - CURSOR_OVERLAP)
+        .order_by('updated_at')
+        .values_list('student_id', 'is_present', 'marked_via_qr', 'timestamp', 'updated_at')
+    )
+    changes = []
+    cursor = since
+    for student_id, is_present, marked_via_qr, timestamp, updated_at in rows:
+        changes.append({
+            'student_id': student_id,
+            'status': status_label(is_present),
+            'marked_via_qr': marked_via_qr,
+            'time': timezone.localtime(timestamp).strftime('%I:%M %p') if timestamp else None,
+            'updated_at': updated_at.isoformat(),
+        })
+        cursor = max(cursor, updated_at)
+    return changes, cursor
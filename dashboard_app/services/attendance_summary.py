@@ -0,0 +1,85 @@
+from collections import defaultdict
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from dashboard_app.models import ClassSession, Enrollment, SessionAttendance
+
+# Attendance counters live on Enrollment (session_count, present_count,
+# absent_count, last_attended_at) so every rate on the dashboards is read
+# from one row. Write paths that know how a mark changed (scans, teacher
+# edits, a new session) shift the counters with F() deltas; the others
+# recount just the enrollments they touched. Both run inside the write's
+# transaction, and `manage.py rebuild_attendance_summary` recounts
+# everything if they ever drift.
+
+
+def _counters():
+    """Per-enrollment counters as subqueries correlated with the row being updated."""
+    marks = SessionAttendance.objects.filter(
+        session__class_obj_id=OuterRef('class_obj_id'), student_id=OuterRef('student_id'),
+    )
+    sessions = ClassSession.objects.filter(class_obj_id=OuterRef('class_obj_id'))
+    return {
+        'session_count': _count_by(sessions, 'class_obj_id'),
+        'present_count': _count_by(marks.filter(is_present=True), 'student_id'),
+        'absent_count': _count_by(marks.filter(is_present=False), 'student_id'),
+        'last_attended_at': Subquery(
+            marks.filter(is_present=True).order_by().values('student_id').annotate(last=Max('timestamp')).values('last')[:1]
+        ),
+    }
+
+
+def _count_by(queryset, group):
+    counted = queryset.order_by().values(group).annotate(n=Count('id')).values('n')[:1]
+    return Coalesce(Subquery(counted), Value(0), output_field=IntegerField())
+
+
+def recount(enrollments):
+    """Recompute the counters of every enrollment in `enrollments` with one UPDATE."""
+    return enrollments.update(**_counters())
+
+
+def recount_class(class_id):
+    return recount(Enrollment.objects.filter(class_obj_id=class_id))
+
+
+def marks_changed(session_id, changes):
+    """
+    Shift the counters of students whose mark in one session changed.
+
+    `changes` maps student id -> (was, now): the row's is_present before and
+    after the write, None meaning unmarked or no row. Students sharing a
+    transition are updated together, so a scan batch costs one UPDATE per
+    distinct transition rather than a recount.
+    """
+    groups = defaultdict(list)
+    for student_id, transition in changes.items():
+        groups[transition].append(student_id)
+
+    class_id = ClassSession.objects.filter(id=session_id).values('class_obj_id')[:1]
+    updated = 0
+    for (was, now), student_ids in groups.items():
+        fields = {}
+        present = (now is True) - (was is True)
+        absent = (now is False) - (was is False)
+        if present:
+            fields['present_count'] = F('present_count') + present
+        if absent:
+            fields['absent_count'] = F('absent_count') + absent
+        if now is True:
+            stamp = Subquery(
+                SessionAttendance.objects.filter(session_id=session_id, student_id=OuterRef('student_id')).values('timestamp')[:1]
+            )
+            fields['last_attended_at'] = Greatest(Coalesce(F('last_attended_at'), stamp), stamp)
+        elif was is True:
+            # This session may have been the latest one attended
+            fields['last_attended_at'] = _counters()['last_attended_at']
+        if fields:
+            updated += Enrollment.objects.filter(
+                class_obj_id=Subquery(class_id), student_id__in=student_ids,
+            ).update(**fields)
+    return updated
+
+
+def session_added(class_id):
+    """A new session starts everyone in the class with one more unmarked session."""
+    return Enrollment.objects.filter(class_obj_id=class_id).update(session_count=F('session_count') + 1)
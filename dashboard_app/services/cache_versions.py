@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# Version counters kept in the cache. Writers bump a key when the data behind
+# it changes; readers compare it with the version their cached copy was built
+# for. Counters only coordinate processes that share the cache, so callers
+# caching across requests check is_shared() first.
+IN_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared():
+    """Whether the default cache is seen by every process (web workers, reaper, flusher)."""
+    return settings.CACHES['default']['BACKEND'] not in IN_PROCESS_BACKENDS
+
+
+def bump(key, timeout):
+    cache.add(key, 0, timeout=timeout)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); a fresh key still signals a change
+        cache.set(key, 1, timeout=timeout)
@@ -0,0 +1,177 @@
+import csv
+import zlib
+from itertools import groupby
+from django.db.models import BooleanField, IntegerField, Value
+from django.http import StreamingHttpResponse
+from dashboard_app.models import ClassSchedule, ClassSession, Enrollment, SessionAttendance
+
+# Rows are pulled from the database in chunks of this size while streaming
+CHUNK_SIZE = 2000
+
+PERSON_FIELDS = ('student__user__first_name', 'student__user__last_name',
+                 'student__user__username', 'student__user__email')
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def full_name(first_name, last_name, username, email):
+    name = f"{first_name} {last_name}".strip()
+    return name or username or email
+
+
+def status_label(is_present):
+    if is_present is True:
+        return "Present"
+    if is_present is False:
+        return "Absent"
+    return "Not Marked"
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(rows, filename, compress=False):
+    """
+    Stream `rows` as a CSV download without building the file in memory.
+
+    With `compress=True` the stream is gzipped on the fly and served as
+    `<filename>.gz`.
+    """
+    writer = csv.writer(Echo())
+    lines = (writer.writerow(row) for row in rows)
+    if compress:
+        response = StreamingHttpResponse(_gzip(lines), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# Row builders. Each is a generator that runs its queries lazily, so the same
+# rows can be streamed to a response or written into an export job's archive.
+
+def enrolled_students_filename(class_obj):
+    return f"{class_obj.code}_enrolled_students.csv"
+
+
+def enrolled_student_rows(class_obj):
+    students = (
+        Enrollment.objects.filter(class_obj=class_obj)
+        .order_by('student__user__last_name', 'student__user__first_name')
+        .values_list(*PERSON_FIELDS)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    yield ['Full Name', 'Email']
+    for first_name, last_name, username, email in students:
+        yield [full_name(first_name, last_name, username, email), email]
+
+
+def session_attendance_filename(class_obj, session):
+    return f"{class_obj.code}_{session.date}_attendance.csv"
+
+
+def session_attendance_rows(class_obj, session):
+    schedules = ClassSchedule.objects.filter(class_obj=class_obj)
+    schedule_text = "; ".join([
+        f"{s.day_of_week} ({s.start_time.strftime('%I:%M %p')} - {s.end_time.strftime('%I:%M %p')})"
+        for s in schedules
+    ])
+
+    yield ['Class Name', 'Section', 'Class Schedule', 'Date']
+    yield [class_obj.title, class_obj.section, schedule_text, session.date.strftime("%B %d, %Y")]
+    yield []
+    yield ['Attendance', '', '', '']
+    yield []
+
+    yield ['Full Name', 'Email', 'Status', '', '']
+
+    stored = SessionAttendance.objects.filter(session=session).values_list(*PERSON_FIELDS, 'is_present')
+    # Enrolled students without a stored row are exported as "Not Marked", like view_session shows them
+    missing = (
+        Enrollment.objects.filter(class_obj=class_obj)
+        .exclude(student_id__in=SessionAttendance.objects.filter(session=session).values('student_id'))
+        .annotate(is_present=Value(None, output_field=BooleanField()))
+        .values_list(*PERSON_FIELDS, 'is_present')
+    )
+
+    # One UNION query ordered by the database, so both halves follow the same collation
+    merged = (
+        stored.union(missing, all=True)
+        .order_by('student__user__first_name', 'student__user__last_name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for first_name, last_name, username, email, is_present in merged:
+        yield [full_name(first_name, last_name, username, email), email, status_label(is_present), '', '']
+
+
+def class_attendance_filename(class_obj):
+    return f"{class_obj.code}_attendance_matrix.csv"
+
+
+def class_attendance_rows(class_obj):
+    """
+    Attendance matrix for a whole class: one row per student, one column per
+    session, then totals. Built from one ordered SessionAttendance query that
+    is pivoted student by student while streaming. Students with no marks at
+    all come from the same query (a UNION ordered by the database), so they
+    fall into place under the database's collation.
+    """
+    sessions = list(ClassSession.objects.filter(class_obj=class_obj).order_by('date', 'id').values_list('id', 'date'))
+    column = {session_id: i for i, (session_id, _) in enumerate(sessions)}
+
+    enrolled = Enrollment.objects.filter(class_obj=class_obj).values('student_id')
+    person_fields = ('student__user__last_name', 'student__user__first_name', 'student_id',
+                     'student__user__username', 'student__user__email')
+    marks = (
+        SessionAttendance.objects
+        .filter(session__class_obj=class_obj, student_id__in=enrolled)
+        .values_list(*person_fields, 'session_id', 'is_present')
+    )
+    unmarked = (
+        Enrollment.objects.filter(class_obj=class_obj)
+        .exclude(student_id__in=SessionAttendance.objects.filter(session__class_obj=class_obj).values('student_id'))
+        .annotate(
+            session_id=Value(None, output_field=IntegerField()),
+            is_present=Value(None, output_field=BooleanField()),
+        )
+        .values_list(*person_fields, 'session_id', 'is_present')
+    )
+    rows = (
+        marks.union(unmarked, all=True)
+        .order_by('student__user__last_name', 'student__user__first_name', 'student_id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    yield ['Full Name', 'Email'] + [date.strftime("%Y-%m-%d") for _, date in sessions] + [
+        'Present', 'Absent', 'Not Marked', 'Attendance Rate (%)'
+    ]
+
+    for (last_name, first_name, _, username, email), student_rows in groupby(rows, key=lambda row: row[:5]):
+        cells = [''] * len(sessions)
+        for *_, session_id, is_present in student_rows:
+            if session_id is None:
+                continue  # an enrolled student with no marks yet
+            if is_present is True:
+                cells[column[session_id]] = 'P'
+            elif is_present is False:
+                cells[column[session_id]] = 'A'
+
+        present = cells.count('P')
+        absent = cells.count('A')
+        rate = round((present / len(sessions)) * 100, 2) if sessions else 0
+        yield [full_name(first_name, last_name, username, email), email] + cells + [
+            present, absent, len(sessions) - present - absent, rate
+        ]
@@ -0,0 +1,117 @@
+import csv
+import io
+import logging
+import tempfile
+import zipfile
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Q
+from django.utils import timezone
+from dashboard_app.models import Class, ClassSession, ExportJob
+from dashboard_app.services import csv_export
+
+logger = logging.getLogger(__name__)
+
+
+def stale_before(now=None):
+    return (now or timezone.now()) - timedelta(seconds=getattr(settings, 'EXPORT_JOB_STALE_SECONDS', 600))
+
+
+def start(teacher, academic_year=None):
+    """Queue an export, or return the teacher's export of the same year that is still in progress."""
+    academic_year = academic_year or None
+    active = ExportJob.objects.filter(
+        Q(status='pending') | Q(status='running', claimed_at__gte=stale_before()),
+        teacher=teacher, academic_year=academic_year,
+    ).first()
+    if active is not None:
+        return active
+    return ExportJob.objects.create(teacher=teacher, academic_year=academic_year)
+
+
+def job_classes(job):
+    classes = Class.objects.filter(teacher_id=job.teacher_id)
+    if job.academic_year:
+        classes = classes.filter(academic_year=job.academic_year)
+    return classes.order_by('code', 'id')
+
+
+def _archive_files(classes):
+    """Yield (path in archive, rows) for every CSV in the export."""
+    for class_obj in classes:
+        folder = f"{class_obj.code}_{class_obj.section or class_obj.id}"
+        yield f"{folder}/{csv_export.enrolled_students_filename(class_obj)}", csv_export.enrolled_student_rows(class_obj)
+        yield f"{folder}/{csv_export.class_attendance_filename(class_obj)}", csv_export.class_attendance_rows(class_obj)
+        for session in ClassSession.objects.filter(class_obj=class_obj).order_by('date', 'id'):
+            yield (
+                f"{folder}/sessions/{session.id}_{csv_export.session_attendance_filename(class_obj, session)}",
+                csv_export.session_attendance_rows(class_obj, session),
+            )
+
+
+def claim(job_id):
+    """Mark a pending job as running; False if another worker got it first."""
+    return ExportJob.objects.filter(id=job_id, status='pending').update(
+        status='running', claimed_at=timezone.now()
+    ) == 1
+
+
+def fail_stale(now=None):
+    """Fail running jobs whose worker stopped reporting progress. Returns how many."""
+    now = now or timezone.now()
+    return ExportJob.objects.filter(
+        Q(claimed_at__lt=stale_before(now)) | Q(claimed_at__isnull=True), status='running',
+    ).update(status='failed', error='The export worker stopped before finishing. Please try again.', finished_at=now)
+
+
+def run(job):
+    """
+    Build the export archive for a claimed job.
+
+    Every CSV is streamed row by row into a zip in a temporary file, so
+    memory stays flat however large the export is, and `completed_steps`
+    is bumped after each file for the progress endpoint. `claimed_at` is
+    re-stamped at the same time, so only a job whose worker died goes stale.
+    """
+    classes = list(job_classes(job).annotate(session_count=Count('sessions')))
+    total = sum(2 + c.session_count for c in classes)
+    ExportJob.objects.filter(id=job.id).update(total_steps=total, completed_steps=0)
+
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for done, (name, rows) in enumerate(_archive_files(classes), start=1):
+                    with archive.open(name, 'w', force_zip64=True) as member:
+                        with io.TextIOWrapper(member, encoding='utf-8', newline='') as text:
+                            csv.writer(text).writerows(rows)
+                    ExportJob.objects.filter(id=job.id).update(
+                        completed_steps=min(done, total), claimed_at=timezone.now()
+                    )
+
+            tmp.seek(0)
+            scope = job.academic_year or 'all'
+            job.file.save(f"attendance_export_{job.id}_{scope}.zip", File(tmp), save=False)
+    except Exception as e:
+        logger.exception("Export job %s failed", job.id)
+        ExportJob.objects.filter(id=job.id).update(status='failed', error=str(e), finished_at=timezone.now())
+        return False
+
+    ExportJob.objects.filter(id=job.id).update(
+        status='done', file=job.file.name, completed_steps=total, finished_at=timezone.now()
+    )
+    return True
+
+
+def run_pending():
+    """Run every queued job, oldest first. Returns the number of jobs handled."""
+    stale = fail_stale()
+    if stale:
+        logger.warning("Marked %s abandoned export job(s) as failed", stale)
+    handled = 0
+    for job in ExportJob.objects.filter(status='pending').order_by('created_at'):
+        if not claim(job.id):
+            continue
+        run(job)
+        handled += 1
+    return handled
@@ -0,0 +1,56 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from dashboard_app.services import cache_versions, roster_cache
+
+# Dashboard templates wrap their data-driven sections in {% cache %} keyed by
+# the user's id and data version. Any write that changes what a user sees
+# (their classes, enrollments, sessions or attendance) replaces the version,
+# so the next render misses and rebuilds. A version is a nanosecond stamp
+# rather than an incr() counter so a whole class can be bumped with one set_many.
+# StudentProfile and TeacherProfile share their user's primary key, so profile
+# ids are used directly as user ids.
+# Bumps come from every process (web workers, the reaper, the scan flusher), so
+# fragments are only cached when the cache backend is shared; with the LocMem
+# default the templates render every time.
+VERSION_KEY = 'fragments:user:{}:version'
+VERSION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_SECONDS', 12 * 60 * 60)
+
+
+def enabled():
+    return timeout() > 0 and cache_versions.is_shared()
+
+
+def version(user_id):
+    key = VERSION_KEY.format(user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+        stamp = cache.get(key, 0)
+    return stamp
+
+
+def bump_users(user_ids):
+    if not enabled():
+        return
+    stamp = time.time_ns()
+    cache.set_many({VERSION_KEY.format(user_id): stamp for user_id in user_ids}, timeout=VERSION_TIMEOUT)
+
+
+def bump_class(class_obj, extra_student_ids=()):
+    """Bump the class's teacher and every enrolled student (plus any just removed)."""
+    if not enabled():
+        return
+    bump_users({class_obj.teacher_id, *roster_cache.student_ids(class_obj.id), *extra_student_ids})
+
+
+def context(user):
+    """Template variables for {% cache fragment_timeout <name> user.id fragment_version %}."""
+    if not enabled():
+        # A zero timeout makes {% cache %} render the fragment and store nothing
+        return {'fragment_version': 0, 'fragment_timeout': 0}
+    return {'fragment_version': version(user.pk), 'fragment_timeout': timeout()}
@@ -0,0 +1,146 @@
+import bisect
+import ipaddress
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+
+
+class NetworkIndex:
+    """
+    Sorted, merged address intervals for a set of networks.
+
+    Membership is a binary search over interval starts, so the check stays
+    O(log n) however many campus ranges are configured.
+    """
+
+    def __init__(self, networks):
+        spans = {4: [], 6: []}
+        for network in networks:
+            spans[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        self._starts = {}
+        self._ends = {}
+        for version, intervals in spans.items():
+            merged = []
+            for start, end in sorted(intervals):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    def __contains__(self, address):
+        value = int(address)
+        i = bisect.bisect_right(self._starts[address.version], value) - 1
+        return i >= 0 and value <= self._ends[address.version][i]
+
+
+def parse_ip(value):
+    """Parse an address string, unwrapping IPv4-mapped IPv6. Returns None if invalid."""
+    try:
+        address = ipaddress.ip_address((value or '').strip())
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+@lru_cache(maxsize=None)
+def _index(cidrs):
+    networks = []
+    for cidr in cidrs:
+        try:
+            networks.append(ipaddress.ip_network(cidr.strip(), strict=False))
+        except ValueError:
+            raise ImproperlyConfigured(f"Invalid network '{cidr}' in network policy settings.")
+    return NetworkIndex(networks)
+
+
+def normalize_networks(value):
+    """
+    Canonical form of a comma- or space-separated CIDR list, as stored on a
+    session. Raises ValidationError for an entry that is not a network.
+    """
+    networks = []
+    for cidr in re.split(r'[\s,]+', value or ''):
+        if not cidr:
+            continue
+        try:
+            networks.append(str(ipaddress.ip_network(cidr, strict=False)))
+        except ValueError:
+            raise ValidationError(f"'{cidr}' is not a valid network (e.g. 192.168.10.0/24).")
+    return ','.join(networks)
+
+
+def validate_networks(value):
+    normalize_networks(value)
+
+
+@lru_cache(maxsize=1024)
+def session_allowed_networks(value):
+    """Index of a session's own allowed networks (a stored, normalized CIDR list)."""
+    return NetworkIndex(ipaddress.ip_network(cidr, strict=False) for cidr in value.split(',') if cidr)
+
+
+def campus_networks():
+    return _index(tuple(getattr(settings, 'CAMPUS_NETWORKS', ())))
+
+
+def trusted_proxies():
+    return _index(tuple(getattr(settings, 'TRUSTED_PROXIES', ())))
+
+
+@lru_cache(maxsize=1024)
+def session_network(teacher_ip):
+    """The subnet a session accepts scans from, derived from the teacher's address."""
+    address = parse_ip(teacher_ip)
+    if address is None:
+        return None
+    prefix = settings.SESSION_NETWORK_PREFIX_V4 if address.version == 4 else settings.SESSION_NETWORK_PREFIX_V6
+    return ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+
+
+def is_allowed(teacher_ip, student_ip, allowed_networks=''):
+    """
+    Check if a student may scan: same subnet as the teacher, inside one of the
+    session's own allowed networks, or anywhere on campus.
+    """
+    student = parse_ip(student_ip)
+    if student is None:
+        return False
+    network = session_network(teacher_ip)
+    if network is not None and student.version == network.version and student in network:
+        return True
+    if allowed_networks and student in session_allowed_networks(allowed_networks):
+        return True
+    return student in campus_networks()
+
+
+def get_client_ip(request):
+    """
+    Get the client's IP address from the request.
+
+    X-Forwarded-For is only honoured when the direct peer is a trusted proxy,
+    and is walked right to left past further trusted hops, so a client
+    cannot spoof its address by sending the header itself.
+    """
+    remote = parse_ip(request.META.get('REMOTE_ADDR'))
+    if remote is None:
+        return '127.0.0.1'  # Default to localhost if no IP found
+
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not forwarded or remote not in trusted_proxies():
+        return str(remote)
+
+    client = remote
+    for hop in reversed(forwarded.split(',')):
+        address = parse_ip(hop)
+        if address is None:
+            break
+        client = address
+        if address not in trusted_proxies():
+            break
+    return str(client)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+# Entries live in Django's cache framework, so the backend is whatever
+# settings.CACHES configures: in-process by default, shared between
+# gunicorn workers once a Redis/Memcached/database backend is set.
+CODE_KEY = 'qr:code:{}'
+SESSION_KEY = 'qr:session:{}'
+
+
+def _entry(qr):
+    session = qr.session
+    return {
+        'code': qr.code,
+        'session_id': session.id,
+        'class_id': session.class_obj_id,
+        'teacher_ip': session.teacher_ip,
+        'status': session.status,
+        'allowed_networks': session.allowed_networks,
+        'expires_at': qr.expires_at,
+    }
+
+
+def store(qr):
+    """Cache an active QR code until it expires. Returns the cached entry."""
+    entry = _entry(qr)
+    ttl = int((qr.expires_at - timezone.now()).total_seconds())
+    if ttl <= 0:
+        return entry
+    cache.set_many({
+        CODE_KEY.format(qr.code): entry,
+        SESSION_KEY.format(entry['session_id']): entry,
+    }, timeout=ttl)
+    return entry
+
+
+def get(code):
+    """Return the cached entry for a code, or None on a miss."""
+    return cache.get(CODE_KEY.format(code))
+
+
+def get_session(session_id):
+    """Return the cached entry for a session's active code, or None on a miss."""
+    return cache.get(SESSION_KEY.format(session_id))
+
+
+def invalidate_session(session_id):
+    """Drop whatever code is cached for a session."""
+    session_key = SESSION_KEY.format(session_id)
+    entry = cache.get(session_key)
+    keys = [session_key]
+    if entry:
+        keys.append(CODE_KEY.format(entry['code']))
+    cache.delete_many(keys)
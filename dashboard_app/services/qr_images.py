@@ -0,0 +1,23 @@
+import hashlib
+import io
+from functools import lru_cache
+import segno
+
+CONTENT_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+
+def etag(scan_url, kind):
+    """Strong ETag: the image is a pure function of the URL it encodes."""
+    digest = hashlib.sha256(f"{kind}:{scan_url}".encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+@lru_cache(maxsize=256)
+def render(scan_url, kind):
+    """Render (and memoize) the QR image for a scan URL as SVG or PNG bytes."""
+    buffer = io.BytesIO()
+    segno.make(scan_url).save(buffer, kind=kind, scale=5)
+    return buffer.getvalue()
@@ -0,0 +1,48 @@
+import time
+from django.conf import settings
+from django.core import signing
+
+# Signed, rotating QR payloads. A token is "<session_id>.<slot>" signed with
+# SECRET_KEY, where slot counts QR_TOKEN_ROTATE_SECONDS windows since the
+# epoch. Verifying one is pure CPU work: no row is written per rotation and
+# none is read per scan.
+SALT = 'dashboard_app.qr_token'
+
+
+def enabled():
+    return getattr(settings, 'QR_TOKEN_MODE', False)
+
+
+def rotate_seconds():
+    return getattr(settings, 'QR_TOKEN_ROTATE_SECONDS', 15)
+
+
+def current_slot(now=None):
+    return int((now or time.time()) // rotate_seconds())
+
+
+def is_token(value):
+    """Plain codes are uuid hex strings, so only tokens contain the ':' separator."""
+    return ':' in value
+
+
+def make_token(session_id, now=None):
+    return signing.Signer(salt=SALT).sign(f"{session_id}.{current_slot(now)}")
+
+
+def verify_token(token, now=None):
+    """
+    Return the session id carried by a token.
+
+    Raises signing.BadSignature for forged or malformed tokens and
+    signing.SignatureExpired once the token is older than the previous slot
+    (one slot of grace covers a scan that lands right after a rotation).
+    """
+    value = signing.Signer(salt=SALT).unsign(token)
+    try:
+        session_id, slot = (int(part) for part in value.split('.'))
+    except ValueError:
+        raise signing.BadSignature('Malformed QR token')
+    if current_slot(now) - slot not in (0, 1):
+        raise signing.SignatureExpired('QR token expired')
+    return session_id
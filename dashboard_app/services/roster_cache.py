@@ -0,0 +1,48 @@
+import time
+from django.core.cache import cache
+from dashboard_app.models import Enrollment
+
+# Enrolled student ids per class, kept in the shared cache so the scan path
+# can check membership without an Enrollment query. Warmed when a session
+# starts and dropped whenever the class's enrollments change. Rosters are
+# stored under the class's current generation, and invalidate() starts a new
+# one instead of deleting the key, so a warm() that queried before the change
+# can only write into the retired generation, which nobody reads.
+GENERATION_KEY = 'roster:class:{}:generation'
+ROSTER_KEY = 'roster:class:{}:{}'
+ROSTER_TIMEOUT = 12 * 60 * 60
+
+
+def _generation(class_id):
+    key = GENERATION_KEY.format(class_id)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), timeout=ROSTER_TIMEOUT)
+        current = cache.get(key, 0)
+    return current
+
+
+def warm(class_id, generation=None):
+    """Load a class's enrolled student ids into the cache and return them."""
+    if generation is None:
+        generation = _generation(class_id)
+    student_ids = frozenset(
+        Enrollment.objects.filter(class_obj_id=class_id).values_list('student_id', flat=True)
+    )
+    cache.set(ROSTER_KEY.format(class_id, generation), student_ids, timeout=ROSTER_TIMEOUT)
+    return student_ids
+
+
+def student_ids(class_id):
+    """A class's enrolled student ids, from the cache when it is warm."""
+    generation = _generation(class_id)
+    cached = cache.get(ROSTER_KEY.format(class_id, generation))
+    return warm(class_id, generation) if cached is None else cached
+
+
+def is_enrolled(class_id, student_id):
+    return student_id in student_ids(class_id)
+
+
+def invalidate(class_id):
+    cache.set(GENERATION_KEY.format(class_id), time.time_ns(), timeout=ROSTER_TIMEOUT)
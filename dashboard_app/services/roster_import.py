@@ -0,0 +1,97 @@
+import codecs
+import csv
+from collections import Counter
+from django.db import transaction
+from auth_app.models import StudentProfile
+from dashboard_app.models import Enrollment
+from dashboard_app.services import attendance_summary
+
+BATCH_SIZE = 500
+
+
+def iter_rows(uploaded_file):
+    """Parse an uploaded CSV line by line as it streams in, without reading it whole."""
+    # UploadedFile yields lines across its chunks; iterdecode handles split multi-byte characters
+    return csv.reader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+
+
+def _enroll_batch(class_obj, batch, errors):
+    """Enroll a batch of {email: (row_num, cell)}. Returns (enrolled, skipped, registered emails)."""
+    profiles = dict(
+        StudentProfile.objects.filter(user__email__in=batch).values_list('user__email', 'pk')
+    )
+    for email, (row_num, cell) in batch.items():
+        if email not in profiles:
+            errors.append((row_num, f"'{cell}' is not registered as a student"))
+
+    already = set(
+        Enrollment.objects.filter(class_obj=class_obj, student_id__in=profiles.values())
+        .values_list('student_id', flat=True)
+    )
+    new_ids = [pk for pk in profiles.values() if pk not in already]
+    Enrollment.objects.bulk_create(
+        [Enrollment(class_obj=class_obj, student_id=pk) for pk in new_ids],
+        ignore_conflicts=True,
+    )
+    # New enrollments start with the class's existing sessions counted
+    attendance_summary.recount(Enrollment.objects.filter(class_obj=class_obj, student_id__in=new_ids))
+    return len(new_ids), len(already), profiles.keys()
+
+
+def import_enrollments(class_obj, uploaded_file, batch_size=BATCH_SIZE):
+    """
+    Enroll every registered student whose email appears in the uploaded CSV.
+
+    Cells containing '@' are treated as emails. They are resolved in batches,
+    each with one IN query per table, one bulk insert and one counter recount,
+    all inside a single transaction. Returns (enrolled, skipped, errors);
+    errors are messages in row order. Repeats of an email count as skipped
+    only if that email belongs to a registered student. Raises UnicodeDecodeError (rolling
+    back) if the file is not UTF-8.
+    """
+    enrolled = 0
+    skipped = 0
+    errors = []
+    seen = set()
+    repeats = Counter()
+    registered = set()
+    batch = {}
+
+    with transaction.atomic():
+        rows = iter_rows(uploaded_file)
+        next(rows, None)  # header
+
+        for row_num, row in enumerate(rows, start=2):
+            for col_num, cell in enumerate(row, start=1):
+                cell = cell.strip()
+                if '@' not in cell:
+                    continue
+                if cell.count('@') != 1 or '.' not in cell.split('@')[1]:
+                    errors.append((row_num, f"Row {row_num}, Column {col_num}: Invalid email format '{cell}'"))
+                    continue
+
+                email = cell.lower()
+                if email in seen:
+                    repeats[email] += 1  # listed twice in the file
+                    continue
+                seen.add(email)
+                batch[email] = (row_num, cell)
+
+                if len(batch) >= batch_size:
+                    added, existing, found = _enroll_batch(class_obj, batch, errors)
+                    enrolled += added
+                    skipped += existing
+                    registered.update(found)
+                    batch = {}
+
+        if batch:
+            added, existing, found = _enroll_batch(class_obj, batch, errors)
+            enrolled += added
+            skipped += existing
+            registered.update(found)
+
+    # An unregistered email is reported once as an error, however often it repeats
+    skipped += sum(count for email, count in repeats.items() if email in registered)
+
+    errors.sort(key=lambda error: error[0])
+    return enrolled, skipped, [message for _, message in errors]
@@ -0,0 +1,103 @@
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from dashboard_app.models import ClassSession, Enrollment, SessionAttendance, SessionQRCode
+from dashboard_app.services import attendance_feed, attendance_summary, fragment_cache
+
+
+def _scan_queryset(student_id):
+    enrolled = Enrollment.objects.filter(
+        class_obj_id=OuterRef('session__class_obj_id'),
+        student_id=student_id,
+    )
+    return (
+        SessionQRCode.objects
+        .select_related('session__class_obj')
+        .annotate(is_enrolled=Exists(enrolled))
+    )
+
+
+def resolve_scan(qr_code, student_id):
+    """
+    Resolve a scanned code in a single query.
+
+    Returns the SessionQRCode with its session and class joined in, annotated
+    with `is_enrolled` for the given student, or None if the code is unknown.
+    """
+    return _scan_queryset(student_id).filter(code=qr_code).first()
+
+
+def resolve_session_scan(session_id, student_id):
+    """Same as resolve_scan, for a signed token that names the session instead."""
+    return _scan_queryset(student_id).filter(session_id=session_id).first()
+
+
+def upsert_qr_attendance(session_id, student_id, now=None):
+    """
+    Mark a student present via QR with one INSERT ... ON CONFLICT statement.
+
+    The (session, student) unique key makes concurrent scans safe: the first
+    one inserts or flips the placeholder row, the rest become no-ops.
+    Returns True if a row was written, False if the student was already
+    marked present via QR, and None if the session is no longer ongoing.
+    """
+    written = upsert_qr_attendance_many(session_id, {student_id: now or timezone.now()})
+    return None if written is None else written > 0
+
+
+def upsert_qr_attendance_many(session_id, scans):
+    """
+    Multi-row variant of upsert_qr_attendance.
+
+    `scans` maps student id -> scan time. All rows go out in a single
+    statement. The students' prior marks are read (and locked) first, so the
+    counters of the students actually written are shifted by their real
+    transition in the same transaction; returns how many rows were written.
+    The session row is locked as well: once it is completed or deleted
+    nothing is written and None is returned.
+    """
+    if not scans:
+        return 0
+    table = connection.ops.quote_name(SessionAttendance._meta.db_table)
+    timestamp_field = SessionAttendance._meta.get_field('timestamp')
+    updated_at = timestamp_field.get_db_prep_value(timezone.now(), connection)
+
+    values = []
+    params = []
+    for student_id, scanned_at in scans.items():
+        values.append("(%s, %s, TRUE, TRUE, %s, %s)")
+        params.extend([session_id, student_id, timestamp_field.get_db_prep_value(scanned_at, connection), updated_at])
+
+    sql = f"""
+        INSERT INTO {table} (session_id, student_id, is_present, marked_via_qr, timestamp, updated_at)
+        VALUES {", ".join(values)}
+        ON CONFLICT (session_id, student_id) DO UPDATE SET
+            is_present = TRUE,
+            marked_via_qr = TRUE,
+            timestamp = COALESCE({table}.timestamp, EXCLUDED.timestamp),
+            updated_at = EXCLUDED.updated_at
+        WHERE {table}.is_present IS NOT TRUE
+            OR {table}.marked_via_qr = FALSE
+            OR {table}.timestamp IS NULL
+        RETURNING student_id
+    """
+    with transaction.atomic():
+        # A scan that raced the end of the session must not land after the
+        # leftover students were marked absent
+        ongoing = ClassSession.objects.select_for_update().filter(id=session_id, status='ongoing').values_list('id')
+        if not ongoing:
+            return None
+        prior = dict(
+            SessionAttendance.objects.select_for_update()
+            .filter(session_id=session_id, student_id__in=list(scans))
+            .values_list('student_id', 'is_present')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            written = [row[0] for row in cursor.fetchall()]
+        attendance_summary.marks_changed(session_id, {student_id: (prior.get(student_id), True) for student_id in written})
+
+    if written:
+        attendance_feed.bump(session_id)
+        fragment_cache.bump_users(written)
+    return len(written)
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from dashboard_app.services.scan import upsert_qr_attendance_many
+
+logger = logging.getLogger(__name__)
+
+# Write-behind buffer for QR scans. Each session gets an append-only log in
+# the cache: HEAD_KEY counts appended scans, ITEM_KEY holds each one and
+# TAIL_KEY records how far the log has been written to the database. Because
+# the log lives in the shared cache, any worker can drain any session.
+HEAD_KEY = 'scanbuf:{}:head'
+TAIL_KEY = 'scanbuf:{}:tail'
+ITEM_KEY = 'scanbuf:{}:item:{}'
+LOCK_KEY = 'scanbuf:{}:lock'
+GAP_KEY = 'scanbuf:{}:gap'
+LOST_KEY = 'scanbuf:{}:lost'
+KEY_TIMEOUT = 6 * 60 * 60  # outlives any class meeting
+LOCK_TIMEOUT = 30
+ITEM_WAIT_SECONDS = 5
+
+_pending_sessions = set()
+_pending_lock = threading.Lock()
+_flusher = None
+
+
+def enabled():
+    # A shared cache is enforced at startup by the dashboard_app.E001 system check
+    return getattr(settings, 'SCAN_BUFFER_MODE', False)
+
+
+def flush_interval():
+    return getattr(settings, 'SCAN_BUFFER_FLUSH_MS', 250) / 1000
+
+
+def batch_size():
+    return getattr(settings, 'SCAN_BUFFER_BATCH_SIZE', 500)
+
+
+def append(session_id, student_id, scanned_at):
+    """Queue a validated scan; the flusher writes it within one flush interval."""
+    head_key = HEAD_KEY.format(session_id)
+    cache.add(head_key, 0, timeout=KEY_TIMEOUT)
+    seq = cache.incr(head_key)
+    cache.set(ITEM_KEY.format(session_id, seq), (student_id, scanned_at), timeout=KEY_TIMEOUT)
+
+    with _pending_lock:
+        _pending_sessions.add(session_id)
+    _ensure_flusher()
+
+
+def flush(session_id, wait=False):
+    """
+    Write one session's buffered scans to the database.
+
+    Duplicate scans collapse to the earliest scan per student, and each batch
+    is applied with a single multi-row upsert. With `wait=True` the call
+    blocks until it owns the session lock and waits up to ITEM_WAIT_SECONDS
+    for scans still being appended, so the buffer is empty on return;
+    otherwise it gives up if another worker is already flushing and stops at
+    a scan not yet stored, unless that scan has been missing for
+    ITEM_WAIT_SECONDS already. A scan given up on is recorded in lost() and
+    skipped, so one dead appender never strands the scans behind it.
+    Returns the number of scans consumed from the log.
+    """
+    lock_key = LOCK_KEY.format(session_id)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        if not wait or time.monotonic() > deadline:
+            return 0
+        time.sleep(0.01)
+
+    try:
+        return _flush_locked(session_id, wait)
+    finally:
+        cache.delete(lock_key)
+
+
+def _flush_locked(session_id, wait):
+    tail_key = TAIL_KEY.format(session_id)
+    head = cache.get(HEAD_KEY.format(session_id), 0)
+    tail = cache.get(tail_key, 0)
+    consumed = 0
+
+    while tail < head:
+        upper = min(head, tail + batch_size())
+        keys = [ITEM_KEY.format(session_id, seq) for seq in range(tail + 1, upper + 1)]
+        items = cache.get_many(keys)
+        # An appender takes its sequence number before storing the item, so a
+        # gap is normally a scan still on its way
+        deadline = time.monotonic() + ITEM_WAIT_SECONDS
+        while wait and len(items) < len(keys) and time.monotonic() < deadline:
+            time.sleep(0.01)
+            items.update(cache.get_many([key for key in keys if key not in items]))
+
+        scans = {}
+        last = tail
+        for seq, key in enumerate(keys, start=tail + 1):
+            if key in items:
+                student_id, scanned_at = items[key]
+                if student_id not in scans or scanned_at < scans[student_id]:
+                    scans[student_id] = scanned_at
+            elif wait or _gap_expired(session_id, seq):
+                # The appender died before storing it, or the item was evicted
+                _record_lost(session_id, seq)
+            else:
+                break
+            last = seq
+
+        if last == tail:
+            break
+
+        if upsert_qr_attendance_many(session_id, scans) is None:
+            # Completed or deleted: scans that missed the final drain are void
+            dropped = discard(session_id)
+            logger.warning("Dropped %s buffered scan(s) for session %s, which is no longer ongoing",
+                           dropped, session_id)
+            return consumed + dropped
+        cache.set(tail_key, last, timeout=KEY_TIMEOUT)
+        cache.delete_many(keys[:last - tail])
+        consumed += last - tail
+        tail = last
+        if last < upper:
+            break  # stopped at a scan still on its way
+
+    return consumed
+
+
+def discard(session_id):
+    """Drop a session's buffered scans without writing them; returns how many were dropped."""
+    head = cache.get(HEAD_KEY.format(session_id), 0)
+    tail = cache.get(TAIL_KEY.format(session_id), 0)
+    cache.delete_many(
+        [key.format(session_id) for key in (HEAD_KEY, TAIL_KEY, GAP_KEY, LOST_KEY)]
+        + [ITEM_KEY.format(session_id, seq) for seq in range(tail + 1, head + 1)]
+    )
+    with _pending_lock:
+        _pending_sessions.discard(session_id)
+    return max(head - tail, 0)
+
+
+def _gap_expired(session_id, seq):
+    """Whether `seq` has been missing for ITEM_WAIT_SECONDS, counted across flushes."""
+    key = GAP_KEY.format(session_id)
+    now = time.time()
+    gap = cache.get(key)
+    if gap is None or gap[0] != seq:
+        cache.set(key, (seq, now), timeout=KEY_TIMEOUT)
+        return False
+    return now - gap[1] >= ITEM_WAIT_SECONDS
+
+
+def _record_lost(session_id, seq):
+    # Called under the session lock, so the read-modify-write cannot race
+    key = LOST_KEY.format(session_id)
+    cache.set(key, cache.get(key, ()) + (seq,), timeout=KEY_TIMEOUT)
+    logger.error("Scan %s of session %s never reached the buffer; skipping it", seq, session_id)
+
+
+def lost(session_id):
+    """Sequence numbers skipped because their scan never reached the buffer."""
+    return cache.get(LOST_KEY.format(session_id), ())
+
+
+def pending_sessions():
+    with _pending_lock:
+        return set(_pending_sessions)
+
+
+def flush_pending():
+    """Flush every session this process has buffered scans for."""
+    for session_id in pending_sessions():
+        flush(session_id)
+        head = cache.get(HEAD_KEY.format(session_id), 0)
+        if cache.get(TAIL_KEY.format(session_id), 0) >= head:
+            with _pending_lock:
+                _pending_sessions.discard(session_id)
+
+
+def _run_flusher():
+    while True:
+        time.sleep(flush_interval())
+        if not pending_sessions():
+            continue
+        close_old_connections()
+        try:
+            flush_pending()
+        except Exception:
+            logger.exception("Scan buffer flush failed; will retry")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _pending_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='scan-buffer-flusher', daemon=True)
+            _flusher.start()
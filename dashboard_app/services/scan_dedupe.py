@@ -0,0 +1,35 @@
+import time
+from django.core.cache import cache
+
+# Students already marked present via QR, one key per student under the
+# session's current generation. Repeat scans are answered from here without
+# touching the database. clear() starts a new generation instead of deleting
+# keys, so a scan that read the old generation before a teacher edit or the
+# end of the session can only record into the old one, which nobody reads.
+# Generations are nanosecond stamps, so a lost generation key never brings
+# back an old one's entries.
+GENERATION_KEY = 'scan:present:{}:generation'
+PRESENT_KEY = 'scan:present:{}:{}:{}'
+PRESENT_TIMEOUT = 6 * 60 * 60
+
+
+def generation(session_id):
+    """The session's current generation; read once per scan and pass to is_present/record."""
+    key = GENERATION_KEY.format(session_id)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), timeout=PRESENT_TIMEOUT)
+        current = cache.get(key, 0)
+    return current
+
+
+def is_present(session_id, generation, student_id):
+    return cache.get(PRESENT_KEY.format(session_id, generation, student_id)) is not None
+
+
+def record(session_id, generation, student_id):
+    cache.set(PRESENT_KEY.format(session_id, generation, student_id), True, timeout=PRESENT_TIMEOUT)
+
+
+def clear(session_id):
+    cache.set(GENERATION_KEY.format(session_id), time.time_ns(), timeout=PRESENT_TIMEOUT)
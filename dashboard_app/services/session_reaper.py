@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from dashboard_app.models import Class, ClassSession, Enrollment, SessionAttendance, SessionQRCode
+from dashboard_app.services import attendance_feed, attendance_summary, fragment_cache, qr_cache, scan_buffer, scan_dedupe, session_roster
+
+
+def overdue_sessions(now=None):
+    """Ongoing sessions whose scheduled meeting is already over."""
+    return ClassSession.objects.overdue(now)
+
+
+def close_sessions(session_ids):
+    """
+    Complete the given sessions and mark every student without a status absent.
+
+    Works on the whole batch at once: enrolled students with no stored row
+    get one inserted as absent, the remaining unmarked rows are updated
+    with a single UPDATE, and the sessions are completed with another.
+    Their QR codes are expired first, so no new scan is accepted while the
+    buffered ones are drained, and scans already past the checks are
+    refused by the upsert once the session is completed.
+    The classes' attendance counters are recounted in the same transaction.
+    Returns the number of sessions that were still ongoing.
+    """
+    session_ids = list(session_ids)
+    if not session_ids:
+        return 0
+
+    now = timezone.now()
+    SessionQRCode.objects.filter(session_id__in=session_ids, expires_at__gt=now).update(
+        expires_at=now, qr_active=False
+    )
+    for session_id in session_ids:
+        qr_cache.invalidate_session(session_id)
+
+    # Buffered scans must land before the remaining students are marked absent
+    for session_id in session_ids:
+        scan_buffer.flush(session_id, wait=True)
+
+    missing = (
+        Enrollment.objects
+        .filter(class_obj__sessions__id__in=session_ids)
+        .annotate(session_id=F('class_obj__sessions__id'))
+        .filter(~Exists(SessionAttendance.objects.filter(
+            session_id=OuterRef('session_id'), student_id=OuterRef('student_id'),
+        )))
+        .values_list('session_id', 'student_id')
+    )
+
+    with transaction.atomic():
+        closed = ClassSession.objects.filter(id__in=session_ids, status='ongoing').update(status='completed')
+        SessionAttendance.objects.bulk_create(
+            [SessionAttendance(session_id=sid, student_id=stid, is_present=False) for sid, stid in missing],
+            batch_size=session_roster.BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        SessionAttendance.objects.filter(session_id__in=session_ids, is_present__isnull=True).update(
+            is_present=False, updated_at=now
+        )
+        attendance_summary.recount(Enrollment.objects.filter(
+            class_obj_id__in=ClassSession.objects.filter(id__in=session_ids).values('class_obj_id'),
+        ))
+
+    for session_id in session_ids:
+        # Again, in case a cache miss stored the old row while draining
+        qr_cache.invalidate_session(session_id)
+        scan_dedupe.clear(session_id)
+        attendance_feed.bump(session_id)
+    for class_obj in Class.objects.filter(sessions__id__in=session_ids).distinct().only('id', 'teacher_id'):
+        fragment_cache.bump_class(class_obj)
+    return closed
+
+
+def reap(now=None, batch_size=session_roster.BATCH_SIZE):
+    """Close every overdue session across all classes. Returns the number closed."""
+    session_ids = list(overdue_sessions(now).values_list('id', flat=True))
+    closed = 0
+    for start in range(0, len(session_ids), batch_size):
+        closed += close_sessions(session_ids[start:start + batch_size])
+    return closed
@@ -0,0 +1,46 @@
+from django.db import transaction
+from dashboard_app.models import Enrollment, SessionAttendance
+from dashboard_app.services import roster_cache
+
+BATCH_SIZE = 500
+
+
+def materialize(session, batch_size=BATCH_SIZE):
+    """
+    Create the placeholder attendance row for every student enrolled in the
+    session's class.
+
+    The roster is read once (warming the roster cache on the way) and the rows
+    are inserted with batched `bulk_create` inside one transaction. Rows that
+    already exist are left untouched, so calling this again is safe.
+    Returns the number of enrolled students.
+    """
+    student_ids = roster_cache.warm(session.class_obj_id)
+    with transaction.atomic():
+        SessionAttendance.objects.bulk_create(
+            [SessionAttendance(session_id=session.id, student_id=sid) for sid in sorted(student_ids)],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+    return len(student_ids)
+
+
+def attendance_rows(session):
+    """
+    Every attendance row of a session, ordered by student name, in two queries.
+
+    Enrolled students without a stored row get an unsaved placeholder
+    (`is_present=None`, shown as "Not Marked"), so reading the roster never
+    writes. Rows are materialized on write: by `materialize`, by the scan
+    upsert, or when the teacher saves.
+    """
+    rows = list(SessionAttendance.objects.filter(session=session).select_related('student__user'))
+    missing = (
+        Enrollment.objects
+        .filter(class_obj_id=session.class_obj_id)
+        .exclude(student_id__in=SessionAttendance.objects.filter(session=session).values('student_id'))
+        .select_related('student__user')
+    )
+    rows.extend(SessionAttendance(session=session, student=e.student) for e in missing)
+    rows.sort(key=lambda a: (a.student.user.first_name, a.student.user.last_name))
+    return rows
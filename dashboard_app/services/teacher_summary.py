@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from dashboard_app.models import Class, Enrollment
+from dashboard_app.services import cache_versions, timetable
+
+# The teacher dashboard's panels only change when the teacher's classes,
+# schedules or enrollments do. Those write paths bump a per-teacher version;
+# the summary is cached with the version (and day) it was built for, and both
+# keys are fetched with one get_many, so an unchanged dashboard is one cache read.
+# With an in-process cache (the LocMem default) the summary is built per request.
+VERSION_KEY = 'teacher:{}:summary:version'
+SUMMARY_KEY = 'teacher:{}:summary'
+VERSION_TIMEOUT = 7 * 24 * 60 * 60
+SUMMARY_TIMEOUT = 12 * 60 * 60
+
+
+def bump(teacher_id):
+    cache_versions.bump(VERSION_KEY.format(teacher_id), VERSION_TIMEOUT)
+
+
+def build(teacher, day):
+    """Compute the dashboard panels with a fixed number of queries."""
+    years = list(Class.objects.filter(teacher=teacher).values_list('academic_year', flat=True))
+
+    # Count unique students across all classes owned by this teacher
+    total_students = (
+        Enrollment.objects.filter(class_obj__teacher=teacher)
+        .values('student')
+        .distinct()
+        .count()
+    )
+
+    todays_classes = []
+    class_ids_seen = set()
+    # Today's classes from the timetable index, with enrolled counts in the same query
+    todays_qs = timetable.meetings_on(teacher, day).annotate(students=Count('class_obj__enrollments'))
+    for sched in todays_qs:
+        cid = sched.class_obj.id
+        if cid in class_ids_seen:
+            continue
+        class_ids_seen.add(cid)
+        todays_classes.append({
+            'id': cid,
+            'code': sched.class_obj.code,
+            'title': sched.class_obj.title,
+            'start_time': sched.start_time,
+            'end_time': sched.end_time,
+            'students': sched.students,
+        })
+
+    return {
+        'total_classes': len(years),
+        'total_students': total_students,
+        'todays_count': len(todays_classes),
+        'todays_classes': todays_classes,
+        'academic_years': sorted({year for year in years if year}, reverse=True),
+    }
+
+
+def get(teacher, day=None):
+    """The teacher's dashboard summary, rebuilt only after a bump or on a new day."""
+    day = day or timezone.localdate()
+    if not cache_versions.is_shared():
+        # Bumps from other workers would never reach an in-process cache
+        return build(teacher, day)
+    version_key = VERSION_KEY.format(teacher.pk)
+    summary_key = SUMMARY_KEY.format(teacher.pk)
+
+    cached = cache.get_many([version_key, summary_key])
+    version = cached.get(version_key)
+    entry = cached.get(summary_key)
+    if version is not None and entry is not None and entry['version'] == version and entry['day'] == day:
+        return entry['summary']
+
+    if version is None:
+        # A lost version key cannot prove any cached summary current; start a new one
+        cache.add(version_key, 0, timeout=VERSION_TIMEOUT)
+        version = cache.get(version_key, 0)
+    summary = build(teacher, day)
+    cache.set(summary_key, {'version': version, 'day': day, 'summary': summary}, timeout=SUMMARY_TIMEOUT)
+    return summary
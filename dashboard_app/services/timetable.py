@@ -0,0 +1,36 @@
+from django.utils import timezone
+from dashboard_app.models import Class, ClassSchedule, MINUTES_PER_DAY
+
+
+def minute_of_week(when=None):
+    """Minutes since Monday 00:00 local time for `when` (default: now)."""
+    local = timezone.localtime(when)
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def _schedules(owner):
+    schedules = ClassSchedule.objects.select_related('class_obj')
+    if owner is None:
+        return schedules
+    if isinstance(owner, Class):
+        return schedules.filter(class_obj=owner)
+    return schedules.filter(class_obj__teacher=owner)
+
+
+def meetings_at(owner, when=None):
+    """
+    Schedules meeting at `when` (default: now).
+
+    `owner` is a Class, a TeacherProfile, or None for the whole campus. The
+    lookup is a range match on the (weekday, start_minute, end_minute) index.
+    """
+    minute = minute_of_week(when)
+    return _schedules(owner).filter(
+        weekday=minute // MINUTES_PER_DAY, start_minute__lte=minute, end_minute__gte=minute,
+    )
+
+
+def meetings_on(owner, day=None):
+    """Schedules meeting on `day` (default: today), earliest first."""
+    day = day or timezone.localdate()
+    return _schedules(owner).filter(weekday=day.weekday()).order_by('start_minute')
@@ -1,3 +1,508 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest import mock
+from django.core import checks
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from auth_app.models import StudentProfile, TeacherProfile, User
+from dashboard_app.models import Class, ClassSchedule, ClassSession, Enrollment, ExportJob, SessionAttendance, SessionQRCode
+from dashboard_app.services import (
+    attendance_summary, csv_export, export_jobs, network_policy, roster_cache, roster_import, scan_buffer, scan_dedupe,
+    session_reaper,
+)
+from dashboard_app.services.scan import upsert_qr_attendance, upsert_qr_attendance_many
 
-# Create your tests here.
+
+def create_student(n, first_name='', last_name=''):
+    user = User.objects.create_user(
+        username=f'student{n}@example.com', email=f'student{n}@example.com', password='pass', user_type='student',
+        first_name=first_name, last_name=last_name,
+    )
+    student = StudentProfile.objects.get(user=user)
+    student.student_id_number = f'S{n:04d}'
+    student.save()
+    return student
+
+
+class UpsertQrAttendanceTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        teacher = TeacherProfile.objects.get(user=teacher_user)
+        self.class_obj = Class.objects.create(teacher=teacher, code='UPS101', title='Upsert')
+        schedule = ClassSchedule.objects.create(
+            class_obj=self.class_obj, day_of_week='Monday', start_time=time(8, 0), end_time=time(9, 0),
+        )
+        self.session = ClassSession.objects.create(class_obj=self.class_obj, schedule_day=schedule)
+
+        student_user = User.objects.create_user(
+            username='student@example.com', email='student@example.com', password='pass', user_type='student',
+        )
+        self.student = StudentProfile.objects.get(user=student_user)
+        self.enrollment = Enrollment.objects.create(class_obj=self.class_obj, student=self.student)
+        attendance_summary.recount_class(self.class_obj.id)
+
+    def attendance(self):
+        return SessionAttendance.objects.get(session=self.session, student=self.student)
+
+    def assertCounters(self, present, absent):
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.present_count, self.enrollment.absent_count), (present, absent))
+
+    def test_inserts_missing_row(self):
+        self.assertTrue(upsert_qr_attendance(self.session.id, self.student.pk))
+
+        attendance = self.attendance()
+        self.assertIs(attendance.is_present, True)
+        self.assertTrue(attendance.marked_via_qr)
+        self.assertIsNotNone(attendance.timestamp)
+        self.assertCounters(present=1, absent=0)
+        self.assertEqual(self.enrollment.last_attended_at, attendance.timestamp)
+
+    def test_flips_unmarked_and_absent_rows(self):
+        for is_present in (None, False):
+            SessionAttendance.objects.update_or_create(
+                session=self.session, student=self.student,
+                defaults={'is_present': is_present, 'marked_via_qr': False, 'timestamp': None},
+            )
+            attendance_summary.recount_class(self.class_obj.id)
+
+            self.assertTrue(upsert_qr_attendance(self.session.id, self.student.pk))
+            attendance = self.attendance()
+            self.assertIs(attendance.is_present, True)
+            self.assertTrue(attendance.marked_via_qr)
+            self.assertCounters(present=1, absent=0)
+
+    def test_refuses_sessions_no_longer_ongoing(self):
+        ClassSession.objects.filter(id=self.session.id).update(status='completed')
+
+        self.assertIsNone(upsert_qr_attendance(self.session.id, self.student.pk))
+        self.assertFalse(SessionAttendance.objects.filter(session=self.session).exists())
+        self.assertCounters(present=0, absent=0)
+
+    def test_already_present_is_a_no_op(self):
+        first_scan = timezone.now() - timedelta(minutes=5)
+        upsert_qr_attendance(self.session.id, self.student.pk, now=first_scan)
+
+        self.assertFalse(upsert_qr_attendance(self.session.id, self.student.pk))
+        self.assertEqual(upsert_qr_attendance_many(self.session.id, {self.student.pk: timezone.now()}), 0)
+        self.assertEqual(self.attendance().timestamp, first_scan)
+        self.assertCounters(present=1, absent=0)
+
+
+@mock.patch.object(scan_buffer, '_ensure_flusher')
+class ScanBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=self.teacher_user), code='BUF101', title='Buffer',
+        )
+        schedule = ClassSchedule.objects.create(
+            class_obj=self.class_obj, day_of_week='Monday', start_time=time(8, 0), end_time=time(9, 0),
+        )
+        self.session = ClassSession.objects.create(class_obj=self.class_obj, schedule_day=schedule)
+        SessionQRCode.objects.create(
+            session=self.session, code='buffer-code', expires_at=timezone.now() + timedelta(minutes=10), qr_active=True,
+        )
+        self.students = []
+        for i in range(3):
+            student = create_student(i)
+            Enrollment.objects.create(class_obj=self.class_obj, student=student)
+            self.students.append(student)
+        attendance_summary.recount_class(self.class_obj.id)
+
+    def present(self):
+        return dict(SessionAttendance.objects.filter(session=self.session, is_present=True)
+                    .values_list('student_id', 'timestamp'))
+
+    def test_drains_in_order_keeping_earliest_scan(self, _flusher):
+        first, second, third = self.students
+        now = timezone.now()
+        scan_buffer.append(self.session.id, first.pk, now)
+        scan_buffer.append(self.session.id, second.pk, now + timedelta(seconds=1))
+        scan_buffer.append(self.session.id, first.pk, now + timedelta(seconds=2))
+
+        self.assertEqual(scan_buffer.flush(self.session.id, wait=True), 3)
+        self.assertEqual(self.present(), {first.pk: now, second.pk: now + timedelta(seconds=1)})
+        self.assertEqual(scan_buffer.flush(self.session.id, wait=True), 0)
+
+        scan_buffer.append(self.session.id, third.pk, now)
+        self.assertEqual(scan_buffer.flush(self.session.id), 1)
+        self.assertIn(third.pk, self.present())
+
+    @mock.patch.object(scan_buffer, 'ITEM_WAIT_SECONDS', 0)
+    def test_wait_flush_skips_lost_scan(self, _flusher):
+        now = timezone.now()
+        for student in self.students:
+            scan_buffer.append(self.session.id, student.pk, now)
+        cache.delete(scan_buffer.ITEM_KEY.format(self.session.id, 2))
+
+        self.assertEqual(scan_buffer.flush(self.session.id, wait=True), 3)
+        self.assertEqual(set(self.present()), {self.students[0].pk, self.students[2].pk})
+        self.assertEqual(scan_buffer.lost(self.session.id), (2,))
+
+    @mock.patch.object(scan_buffer, 'ITEM_WAIT_SECONDS', 0)
+    def test_background_flush_skips_gap_once_expired(self, _flusher):
+        now = timezone.now()
+        for student in self.students:
+            scan_buffer.append(self.session.id, student.pk, now)
+        cache.delete(scan_buffer.ITEM_KEY.format(self.session.id, 2))
+
+        # The first flush only notes the gap; the scan may still be on its way
+        self.assertEqual(scan_buffer.flush(self.session.id), 1)
+        self.assertEqual(scan_buffer.lost(self.session.id), ())
+        self.assertEqual(scan_buffer.flush(self.session.id), 2)
+        self.assertEqual(scan_buffer.lost(self.session.id), (2,))
+        self.assertEqual(len(self.present()), 2)
+
+    def test_delete_session_discards_buffer(self, _flusher):
+        scan_buffer.append(self.session.id, self.students[0].pk, timezone.now())
+        self.client.force_login(self.teacher_user)
+        self.client.get(reverse('dashboard_teacher:delete_session', args=[self.session.id]))
+
+        self.assertFalse(ClassSession.objects.filter(id=self.session.id).exists())
+        self.assertNotIn(self.session.id, scan_buffer.pending_sessions())
+        self.assertEqual(scan_buffer.flush(self.session.id, wait=True), 0)
+
+    def test_needs_shared_cache(self, _flusher):
+        with override_settings(SCAN_BUFFER_MODE=True):
+            errors = checks.run_checks(tags=[checks.Tags.caches])
+        self.assertIn('dashboard_app.E001', [error.id for error in errors])
+
+    def test_close_drains_buffer_before_marking_absent(self, _flusher):
+        first, second, third = self.students
+        scan_buffer.append(self.session.id, first.pk, timezone.now())
+
+        self.assertEqual(session_reaper.close_sessions([self.session.id]), 1)
+        marks = dict(SessionAttendance.objects.filter(session=self.session).values_list('student_id', 'is_present'))
+        self.assertEqual(marks, {first.pk: True, second.pk: False, third.pk: False})
+        self.assertFalse(SessionQRCode.objects.get(session=self.session).qr_active)
+
+    def test_scans_after_close_are_dropped(self, _flusher):
+        session_reaper.close_sessions([self.session.id])
+        scan_buffer.append(self.session.id, self.students[0].pk, timezone.now())
+
+        self.assertEqual(scan_buffer.flush(self.session.id), 1)
+        self.assertEqual(self.present(), {})
+        self.assertEqual(scan_buffer.flush(self.session.id), 0)
+
+
+class QrImageTests(TestCase):
+    def setUp(self):
+        self.teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=self.teacher_user), code='QRI101', title='QR image',
+        )
+        schedule = ClassSchedule.objects.create(
+            class_obj=class_obj, day_of_week='Monday', start_time=time(8, 0), end_time=time(9, 0),
+        )
+        session = ClassSession.objects.create(class_obj=class_obj, schedule_day=schedule)
+        SessionQRCode.objects.create(session=session, code='image-code', expires_at=timezone.now() + timedelta(minutes=5))
+        self.url = reverse('dashboard_teacher:qr_image', args=[class_obj.id, session.id, 'image-code'])
+        self.client.force_login(self.teacher_user)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+
+class RosterCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=teacher_user), code='ROS101', title='Roster',
+        )
+        self.student = create_student(1)
+
+    def test_warm_that_raced_an_invalidate_is_not_served(self):
+        self.assertFalse(roster_cache.is_enrolled(self.class_obj.id, self.student.pk))
+
+        # A warm() that read the roster before the enrollment writes after the invalidate
+        generation = roster_cache._generation(self.class_obj.id)
+        stale = frozenset(Enrollment.objects.filter(class_obj=self.class_obj).values_list('student_id', flat=True))
+        Enrollment.objects.create(class_obj=self.class_obj, student=self.student)
+        roster_cache.invalidate(self.class_obj.id)
+        cache.set(roster_cache.ROSTER_KEY.format(self.class_obj.id, generation), stale)
+
+        self.assertTrue(roster_cache.is_enrolled(self.class_obj.id, self.student.pk))
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.teacher = TeacherProfile.objects.get(user=teacher_user)
+
+    def test_start_reuses_active_job_of_the_same_year_only(self):
+        all_years = export_jobs.start(self.teacher)
+        this_year = export_jobs.start(self.teacher, '2025-2026')
+
+        self.assertNotEqual(all_years.id, this_year.id)
+        self.assertIsNone(all_years.academic_year)
+        self.assertEqual(export_jobs.start(self.teacher, '').id, all_years.id)
+        self.assertEqual(export_jobs.start(self.teacher, '2025-2026').id, this_year.id)
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    def test_stale_running_jobs_fail_and_are_not_reused(self):
+        stale = ExportJob.objects.create(
+            teacher=self.teacher, status='running', claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        live = ExportJob.objects.create(teacher=self.teacher, academic_year='2025-2026', status='running',
+                                        claimed_at=timezone.now())
+
+        self.assertNotEqual(export_jobs.start(self.teacher).id, stale.id)
+        self.assertEqual(export_jobs.fail_stale(), 1)
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual((stale.status, live.status), ('failed', 'running'))
+        self.assertIsNotNone(stale.finished_at)
+
+
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=teacher_user), code='SUM101', title='Summary',
+        )
+        schedule = ClassSchedule.objects.create(
+            class_obj=self.class_obj, day_of_week='Monday', start_time=time(8, 0), end_time=time(9, 0),
+        )
+        self.first = ClassSession.objects.create(class_obj=self.class_obj, schedule_day=schedule)
+        self.second = ClassSession.objects.create(class_obj=self.class_obj, schedule_day=schedule)
+        self.student = create_student(1)
+        self.enrollment = Enrollment.objects.create(class_obj=self.class_obj, student=self.student)
+        self.earlier = timezone.now() - timedelta(days=7)
+        self.later = timezone.now()
+
+    def mark(self, session, is_present, timestamp=None):
+        SessionAttendance.objects.update_or_create(
+            session=session, student=self.student, defaults={'is_present': is_present, 'timestamp': timestamp},
+        )
+
+    def counters(self):
+        self.enrollment.refresh_from_db()
+        return (self.enrollment.session_count, self.enrollment.present_count, self.enrollment.absent_count,
+                self.enrollment.last_attended_at)
+
+    def test_present_to_absent_recomputes_last_attended(self):
+        self.mark(self.first, True, self.earlier)
+        self.mark(self.second, True, self.later)
+        attendance_summary.recount_class(self.class_obj.id)
+        self.assertEqual(self.counters(), (2, 2, 0, self.later))
+
+        self.mark(self.second, False)
+        attendance_summary.marks_changed(self.second.id, {self.student.pk: (True, False)})
+        self.assertEqual(self.counters(), (2, 1, 1, self.earlier))
+
+        self.mark(self.first, False)
+        attendance_summary.marks_changed(self.first.id, {self.student.pk: (True, False)})
+        self.assertEqual(self.counters(), (2, 0, 2, None))
+
+    def test_absent_to_unmarked(self):
+        self.mark(self.first, False)
+        attendance_summary.recount_class(self.class_obj.id)
+        self.assertEqual(self.counters(), (2, 0, 1, None))
+
+        self.mark(self.first, None)
+        attendance_summary.marks_changed(self.first.id, {self.student.pk: (False, None)})
+        self.assertEqual(self.counters(), (2, 0, 0, None))
+
+    def test_unmarked_to_present_keeps_latest_attendance(self):
+        self.mark(self.second, True, self.later)
+        attendance_summary.recount_class(self.class_obj.id)
+
+        self.mark(self.first, True, self.earlier)
+        attendance_summary.marks_changed(self.first.id, {self.student.pk: (None, True)})
+        self.assertEqual(self.counters(), (2, 2, 0, self.later))
+
+    def test_close_recounts_leftover_students_as_absent(self):
+        self.mark(self.first, True, self.earlier)
+        attendance_summary.recount_class(self.class_obj.id)
+
+        self.assertEqual(session_reaper.close_sessions([self.first.id, self.second.id]), 2)
+        self.assertEqual(self.counters(), (2, 1, 1, self.earlier))
+
+
+class ScanDedupeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_clear_retires_the_generation(self):
+        generation = scan_dedupe.generation(1)
+        scan_dedupe.record(1, generation, 7)
+        self.assertTrue(scan_dedupe.is_present(1, generation, 7))
+        self.assertEqual(scan_dedupe.generation(1), generation)
+
+        scan_dedupe.clear(1)
+        current = scan_dedupe.generation(1)
+        self.assertNotEqual(current, generation)
+        self.assertFalse(scan_dedupe.is_present(1, current, 7))
+
+        # A scan that read the old generation before the clear records into it
+        scan_dedupe.record(1, generation, 7)
+        self.assertFalse(scan_dedupe.is_present(1, scan_dedupe.generation(1), 7))
+
+    def test_sessions_are_independent(self):
+        scan_dedupe.record(1, scan_dedupe.generation(1), 7)
+        self.assertFalse(scan_dedupe.is_present(2, scan_dedupe.generation(2), 7))
+
+
+@override_settings(TRUSTED_PROXIES=['127.0.0.1/32', '10.0.0.0/8'], CAMPUS_NETWORKS=['172.16.0.0/12'])
+class NetworkPolicyTests(TestCase):
+    def client_ip(self, remote_addr, forwarded=None):
+        meta = {'REMOTE_ADDR': remote_addr}
+        if forwarded is not None:
+            meta['HTTP_X_FORWARDED_FOR'] = forwarded
+        return network_policy.get_client_ip(RequestFactory().get('/', **meta))
+
+    def test_forwarded_for_is_only_honoured_from_trusted_proxies(self):
+        self.assertEqual(self.client_ip('203.0.113.9', '198.51.100.1'), '203.0.113.9')
+        self.assertEqual(self.client_ip('127.0.0.1', '198.51.100.1'), '198.51.100.1')
+        # Walked right to left past trusted hops; anything left of the first untrusted one is spoofable
+        self.assertEqual(self.client_ip('127.0.0.1', '192.0.2.7, 198.51.100.1, 10.1.2.3'), '198.51.100.1')
+        self.assertEqual(self.client_ip('127.0.0.1', 'garbage'), '127.0.0.1')
+        self.assertEqual(self.client_ip('::ffff:203.0.113.9'), '203.0.113.9')
+
+    def test_normalize_networks(self):
+        self.assertEqual(
+            network_policy.normalize_networks('192.168.10.7/24, 2001:db8::1/64  10.0.0.0/8'),
+            '192.168.10.0/24,2001:db8::/64,10.0.0.0/8',
+        )
+        self.assertEqual(network_policy.normalize_networks(''), '')
+        with self.assertRaises(ValidationError):
+            network_policy.normalize_networks('192.168.10.0/24,not-a-network')
+
+    def test_is_allowed(self):
+        self.assertTrue(network_policy.is_allowed('192.168.1.10', '192.168.1.200'))
+        self.assertFalse(network_policy.is_allowed('192.168.1.10', '192.168.2.200'))
+        self.assertTrue(network_policy.is_allowed('192.168.1.10', '192.168.2.200', '192.168.0.0/16'))
+        self.assertTrue(network_policy.is_allowed('192.168.1.10', '172.20.4.4'))
+        self.assertTrue(network_policy.is_allowed('192.168.1.10', '::ffff:192.168.1.200'))
+        self.assertFalse(network_policy.is_allowed('192.168.1.10', 'not-an-ip'))
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=teacher_user), code='IMP101', title='Import',
+        )
+        self.new = create_student(1)
+        self.existing = create_student(2)
+        Enrollment.objects.create(class_obj=self.class_obj, student=self.existing)
+
+    def test_skip_and_error_accounting(self):
+        upload = SimpleUploadedFile('roster.csv', (
+            "email\n"
+            "Student1@Example.com\n"
+            "student2@example.com\n"
+            "ghost@example.com\n"
+            "broken@nowhere\n"
+            "student1@example.com\n"
+            "ghost@example.com\n"
+        ).encode('utf-8'))
+
+        enrolled, skipped, errors = roster_import.import_enrollments(self.class_obj, upload, batch_size=2)
+
+        self.assertEqual(enrolled, 1)
+        # Already enrolled, plus the registered student listed twice; the repeated ghost is not skipped
+        self.assertEqual(skipped, 2)
+        self.assertEqual(errors, [
+            "'ghost@example.com' is not registered as a student",
+            "Row 5, Column 1: Invalid email format 'broken@nowhere'",
+        ])
+        self.assertTrue(Enrollment.objects.filter(class_obj=self.class_obj, student=self.new).exists())
+
+
+class HistoryWindowTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=teacher_user), code='HIS101', title='History',
+        )
+        student = create_student(1)
+        Enrollment.objects.create(class_obj=class_obj, student=student)
+        self.url = reverse('dashboard_student:view_attendance', args=[class_obj.id])
+        self.client.force_login(student.user)
+
+    def test_window_is_clamped_to_representable_dates(self):
+        response = self.client.get(self.url, {'start': '0001-01-01', 'end': '0001-01-10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['older_range'])
+        self.assertEqual(response.context['newer_range'], (date(1, 1, 11), date(1, 1, 20)))
+
+        response = self.client.get(self.url, {'start': '9999-12-01', 'end': '9999-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['newer_range'])
+
+        response = self.client.get(self.url, {'end': '0001-01-05'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['history_start'], date.min)
+
+    def test_reversed_window_is_swapped(self):
+        response = self.client.get(self.url, {'start': '2026-02-10', 'end': '2026-02-01'})
+        self.assertEqual((response.context['history_start'], response.context['history_end']),
+                         (date(2026, 2, 1), date(2026, 2, 10)))
+
+
+class CsvExportTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='pass', user_type='teacher',
+        )
+        self.class_obj = Class.objects.create(
+            teacher=TeacherProfile.objects.get(user=teacher_user), code='CSV101', title='Export',
+        )
+        schedule = ClassSchedule.objects.create(
+            class_obj=self.class_obj, day_of_week='Monday', start_time=time(8, 0), end_time=time(9, 0),
+        )
+        self.session = ClassSession.objects.create(class_obj=self.class_obj, schedule_day=schedule)
+        ana = create_student(1, 'Ana', 'Zed')
+        bea = create_student(2, 'Bea', 'Young')  # enrolled, never marked
+        cal = create_student(3, 'Cal', 'Xu')
+        for student in (cal, ana, bea):
+            Enrollment.objects.create(class_obj=self.class_obj, student=student)
+        SessionAttendance.objects.create(session=self.session, student=ana, is_present=True)
+        SessionAttendance.objects.create(session=self.session, student=cal, is_present=False)
+
+    def test_session_rows_merge_unmarked_students_in_name_order(self):
+        rows = list(csv_export.session_attendance_rows(self.class_obj, self.session))[6:]
+        self.assertEqual([row[:3] for row in rows], [
+            ['Ana Zed', 'student1@example.com', 'Present'],
+            ['Bea Young', 'student2@example.com', 'Not Marked'],
+            ['Cal Xu', 'student3@example.com', 'Absent'],
+        ])
+
+    def test_class_matrix_orders_by_last_name(self):
+        rows = list(csv_export.class_attendance_rows(self.class_obj))[1:]
+        self.assertEqual(rows, [
+            ['Cal Xu', 'student3@example.com', 'A', 0, 1, 0, 0.0],
+            ['Bea Young', 'student2@example.com', '', 0, 0, 1, 0.0],
+            ['Ana Zed', 'student1@example.com', 'P', 1, 0, 0, 100.0],
+        ])
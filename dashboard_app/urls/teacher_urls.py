@@ -20,6 +20,12 @@ urlpatterns = [
     path('class/<int:class_id>/', teacher_views.view_class, name='view_class'),
     path('class/<int:class_id>/upload-csv/', teacher_views.upload_students_csv, name='upload_students_csv'),
     path('class/<int:class_id>/export/', teacher_views.export_enrolled_students, name='export_enrolled_students_csv'),
+    path('class/<int:class_id>/export-attendance/', teacher_views.export_class_attendance, name='export_class_attendance'),
+
+    # Export Jobs (AJAX)
+    path('exports/start/', teacher_views.start_export, name='start_export'),
+    path('exports/<int:job_id>/', teacher_views.export_status, name='export_status'),
+    path('exports/<int:job_id>/download/', teacher_views.download_export, name='download_export'),
 
     # Class Sessions
     path('class/<int:class_id>/create-session/', teacher_views.create_session, name='create_session'),
@@ -30,7 +36,9 @@ urlpatterns = [
 
     # View Session
     path('class/<int:class_id>/session/<int:session_id>/', teacher_views.view_session, name='view_session'),
+    path('class/<int:class_id>/session/<int:session_id>/attendance-changes/', teacher_views.attendance_changes, name='attendance_changes'),
 
     # Generate QR (AJAX)
     path('class/<int:class_id>/session/<int:session_id>/generate-qr/', teacher_views.generate_qr, name='generate_qr'),
+    path('class/<int:class_id>/session/<int:session_id>/qr/<str:qr_code>/', teacher_views.qr_image, name='qr_image'),
 ]
@@ -1,30 +1,40 @@
+from datetime import date, timedelta
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from dashboard_app.models import Enrollment, SessionAttendance, ClassSession, SessionQRCode
+from dashboard_app.models import Enrollment, SessionAttendance, ClassSession
 from django.http import JsonResponse, HttpResponseForbidden
 from django.utils import timezone
-from django.db import transaction
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.db import transaction, DatabaseError
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 from django.core.exceptions import PermissionDenied
+from django.core import signing
 from auth_app.models import StudentProfile
 from dashboard_app.forms import StudentProfileEditForm
+from dashboard_app.services import fragment_cache, network_policy, qr_cache, qr_tokens, roster_cache, scan_buffer, scan_dedupe
+from dashboard_app.services.network_policy import get_client_ip
+from dashboard_app.services.scan import resolve_scan, resolve_session_scan, upsert_qr_attendance
+
+# Days of attendance history shown per page in view_attendance
+HISTORY_WINDOW_DAYS = 90
+
+
+def _query_date(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
 
-def get_client_ip(request):
-    """Get the client's IP address from the request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip or '127.0.0.1'  # Default to localhost if no IP found
 
-def same_network(teacher_ip: str, student_ip: str) -> bool:
-    """Check if student IP is on the same network as teacher IP."""
-    if not teacher_ip or not student_ip:
-        return False
-    teacher_prefix = ".".join(teacher_ip.split(".")[:3])
-    student_prefix = ".".join(student_ip.split(".")[:3])
-    return teacher_prefix == student_prefix
+def _shift(day, days):
+    """`day` moved by `days`, clamped to the dates Python can represent."""
+    try:
+        return day + timedelta(days=days)
+    except OverflowError:
+        return date.max if days > 0 else date.min
 
 
 # ==============================
@@ -36,16 +46,19 @@ def dashboard_student(request):
         return redirect('dashboard_teacher:dashboard')
 
     student_profile = getattr(request.user, 'studentprofile', None)
-    enrolled_classes = Enrollment.objects.filter(student=student_profile).select_related('class_obj')
-
-    total_classes = enrolled_classes.count()
-
-    total_sessions = SessionAttendance.objects.filter(student=student_profile).count()
-    attended_sessions = SessionAttendance.objects.filter(
-        student=student_profile, is_present=True
-    ).count()
+    # Read from the per-enrollment counters instead of counting attendance rows
+    totals = Enrollment.objects.filter(student=student_profile).aggregate(
+        total_classes=Count('id'),
+        total_sessions=Coalesce(Sum('session_count'), 0),
+        attended_sessions=Coalesce(Sum('present_count'), 0),
+        missed_sessions=Coalesce(Sum('absent_count'), 0),
+    )
 
-    missed_sessions = total_sessions - attended_sessions if total_sessions > 0 else 0
+    total_classes = totals['total_classes']
+    total_sessions = totals['total_sessions']
+    attended_sessions = totals['attended_sessions']
+    # Only sessions marked absent; ongoing and unmarked sessions are not missed yet
+    missed_sessions = totals['missed_sessions']
     attendance_rate = round((attended_sessions / total_sessions) * 100, 2) if total_sessions > 0 else 0
 
     context = {
@@ -61,28 +74,21 @@ def dashboard_student(request):
 # ==============================
 # MY CLASSES
 # ==============================
-@login_required
-def student_classes(request):
-    if request.user.user_type != 'student':
-        return redirect('dashboard_teacher:dashboard')
-
-    student_profile = getattr(request.user, 'studentprofile', None)
-    enrollments = Enrollment.objects.filter(student=student_profile).select_related(
-        'class_obj', 'class_obj__teacher'
+def _enrolled_classes(student_profile):
+    # Rates come from the enrollment's counters; schedules are prefetched
+    enrollments = (
+        Enrollment.objects
+        .filter(student=student_profile)
+        .select_related('class_obj__teacher__user')
+        .prefetch_related('class_obj__schedules')
+        .order_by('id')
     )
 
     enrolled_classes = []
 
-    for e in enrollments:
-        class_obj = e.class_obj
-        sessions = ClassSession.objects.filter(class_obj=class_obj)
-        total_sessions = sessions.count()
-
-        attended_sessions = SessionAttendance.objects.filter(
-            student=student_profile, session__in=sessions, is_present=True
-        ).count()
-
-        attendance_rate = round((attended_sessions / total_sessions) * 100, 2) if total_sessions > 0 else 0
+    for enrollment in enrollments:
+        class_obj = enrollment.class_obj
+        schedules = class_obj.schedules.all()
 
         enrolled_classes.append({
             'id': class_obj.id,
@@ -91,23 +97,34 @@ def student_classes(request):
             'title': class_obj.title,
             'subject': class_obj.title,
             'teacher_name': class_obj.teacher.user.get_full_name(),
-            'schedule': ", ".join(s.day_of_week for s in class_obj.schedules.all()),
+            'schedule': ", ".join(s.day_of_week for s in schedules),
             'schedules': [
                 {
                     'day_of_week': s.day_of_week,
                     'start_time': s.start_time,
                     'end_time': s.end_time,
-                } for s in class_obj.schedules.all()
+                } for s in schedules
             ],
             'semester': class_obj.semester,
             'academic_year': class_obj.academic_year,
-            'session_count': total_sessions,
-            'attendance_rate': attendance_rate,
+            'session_count': enrollment.session_count,
+            'attendance_rate': enrollment.attendance_rate,
         })
+    return enrolled_classes
+
+
+@login_required
+def student_classes(request):
+    if request.user.user_type != 'student':
+        return redirect('dashboard_teacher:dashboard')
 
     context = {
         'user_type': 'student',
-        'enrolled_classes': enrolled_classes,
+        # Only built when the cached class list has to be rendered again
+        'enrolled_classes': SimpleLazyObject(
+            lambda: _enrolled_classes(getattr(request.user, 'studentprofile', None))
+        ),
+        **fragment_cache.context(request.user),
     }
     return render(request, "dashboard_app/student/student_classes.html", context)
 
@@ -132,15 +149,29 @@ def view_attendance(request, class_id):
 
     class_obj = enrollment.class_obj
 
-    sessions = ClassSession.objects.filter(class_obj=class_obj).order_by('-date')
-    attendance_records = SessionAttendance.objects.filter(
-        student=student_profile,
-        session__in=sessions
-    ).select_related("session")
+    # History is shown one date window at a time (?start=YYYY-MM-DD&end=YYYY-MM-DD)
+    end = _query_date(request, 'end') or timezone.localdate()
+    start = _query_date(request, 'start') or _shift(end, -(HISTORY_WINDOW_DAYS - 1))
+    if start > end:
+        start, end = end, start
+    window = (end - start).days + 1
+
+    sessions = list(
+        ClassSession.objects
+        .filter(class_obj=class_obj, date__range=(start, end))
+        .select_related('schedule_day')
+        .order_by('-date', '-id')
+    )
+    records = {
+        record.session_id: record
+        for record in SessionAttendance.objects.filter(
+            student=student_profile, session__class_obj=class_obj, session__date__range=(start, end)
+        )
+    }
 
     attendance_data = []
     for session in sessions:
-        attendance = attendance_records.filter(session=session).first()
+        attendance = records.get(session.id)
         if attendance and attendance.is_present is True:
             status = "Present"
         elif attendance and attendance.is_present is False:
@@ -156,10 +187,13 @@ def view_attendance(request, class_id):
             'scan_time': attendance.timestamp if attendance else None,
         })
 
-    total_present = attendance_records.filter(is_present=True).count()
-    total_absent = attendance_records.filter(is_present=False).count()
-    total_sessions = sessions.count()
-    attendance_rate = round((total_present / total_sessions) * 100, 2) if total_sessions > 0 else 0
+    # Totals cover the whole class, not just the window, and come from the enrollment's counters
+    total_present = enrollment.present_count
+    total_absent = enrollment.absent_count
+    attendance_rate = enrollment.attendance_rate
+
+    has_older = ClassSession.objects.filter(class_obj=class_obj, date__lt=start).exists()
+    has_newer = end < timezone.localdate()
 
     context = {
         'user_type': 'student',
@@ -169,6 +203,10 @@ def view_attendance(request, class_id):
         'total_present': total_present,
         'total_absent': total_absent,
         'attendance_rate': attendance_rate,
+        'history_start': start,
+        'history_end': end,
+        'older_range': (_shift(start, -window), _shift(start, -1)) if has_older else None,
+        'newer_range': (_shift(end, 1), _shift(end, window)) if has_newer else None,
     }
     return render(request, "dashboard_app/student/view_attendance.html", context)
 
@@ -209,21 +247,50 @@ def mark_attendance(request, qr_code):
     if request.user.user_type != 'student':
         return JsonResponse({'error': 'Unauthorized access'}, status=403)
 
-    try:
-        qr = SessionQRCode.objects.get(code=qr_code)
-    except SessionQRCode.DoesNotExist:
+    # StudentProfile shares its primary key with User, so no profile lookup is needed
+    student_id = request.user.pk
+
+    # Live codes are served from the shared cache; fall back to the DB on a miss
+    qr = None
+    if qr_tokens.is_token(qr_code):
+        try:
+            session_id = qr_tokens.verify_token(qr_code)
+        except signing.SignatureExpired:
+            return JsonResponse({'error': 'QR code expired'}, status=400)
+        except signing.BadSignature:
+            return JsonResponse({'error': 'Invalid or unknown QR code'}, status=404)
+        entry = qr_cache.get_session(session_id)
+        if entry is None:
+            qr = resolve_session_scan(session_id, student_id)
+    elif qr_tokens.enabled():
+        # Token mode never shows bare codes to students, so refuse them
         return JsonResponse({'error': 'Invalid or unknown QR code'}, status=404)
+    else:
+        entry = qr_cache.get(qr_code)
+        if entry is None:
+            qr = resolve_scan(qr_code, student_id)
+
+    if entry is None:
+        if qr is None:
+            return JsonResponse({'error': 'Invalid or unknown QR code'}, status=404)
+        entry = qr_cache.store(qr)
+        is_enrolled = qr.is_enrolled
+    else:
+        is_enrolled = None
 
-    if timezone.now() > qr.expires_at:
+    if timezone.now() > entry['expires_at']:
         return JsonResponse({'error': 'QR code expired'}, status=400)
 
-    student_profile = getattr(request.user, 'studentprofile', None)
-    session = qr.session
+    if entry['status'] != 'ongoing':
+        return JsonResponse({'error': 'This session has ended.'}, status=400)
 
-    is_enrolled = Enrollment.objects.filter(
-        student=student_profile,
-        class_obj=session.class_obj
-    ).exists()
+    # Repeat scans are answered from the dedupe cache without touching the DB
+    dedupe_generation = scan_dedupe.generation(entry['session_id'])
+    if scan_dedupe.is_present(entry['session_id'], dedupe_generation, student_id):
+        return _already_marked_response(entry, student_id)
+
+    if is_enrolled is None:
+        is_enrolled = roster_cache.is_enrolled(entry['class_id'], student_id)
 
     if not is_enrolled:
         return JsonResponse({'error': 'You are not enrolled in this class.'}, status=403)
@@ -231,57 +298,40 @@ def mark_attendance(request, qr_code):
     # Get student's IP address
     student_ip = get_client_ip(request)
 
-    # Check if student is on the same network as teacher
-    is_same_network = same_network(session.teacher_ip, student_ip)
+    # Check if student is on the teacher's network (or an allowed campus range)
+    is_same_network = network_policy.is_allowed(entry['teacher_ip'], student_ip, entry['allowed_networks'])
     if not is_same_network:
         return JsonResponse({'error': 'Your attendance is unmarked because your WiFi is not the same as the teacher.'}, status=400)
 
-    attendance_status = True  # Only mark as present if on same network
+    if scan_buffer.enabled():
+        # Write-behind: acknowledge now, the flusher applies the scan in bulk
+        scan_buffer.append(entry['session_id'], student_id, timezone.now())
+        marked = True
+    else:
+        try:
+            marked = upsert_qr_attendance(entry['session_id'], student_id)
+        except DatabaseError as e:
+            return JsonResponse({'error': f'Failed to mark attendance: {str(e)}'}, status=500)
+        if marked is None:
+            return JsonResponse({'error': 'This session has ended.'}, status=400)
 
-    try:
-        attendance, created = SessionAttendance.objects.get_or_create(
-            student=student_profile,
-            session=session,
-            defaults={'is_present': attendance_status, 'marked_via_qr': True, 'timestamp': timezone.now()}
-        )
+    scan_dedupe.record(entry['session_id'], dedupe_generation, student_id)
 
-        if created:
-            status_text = "present" if attendance_status else "absent"
-            return JsonResponse({
-                'message': f'Attendance marked as {status_text} via QR!',
-                'class_id': session.class_obj.id,
-                'student_id': student_profile.pk,
-                'status': status_text
-            })
-
-        updated = False
-        if attendance.is_present != attendance_status:
-            attendance.is_present = attendance_status
-            updated = True
-        if not attendance.marked_via_qr:
-            attendance.marked_via_qr = True
-            updated = True
-        if not attendance.timestamp:
-            attendance.timestamp = timezone.now()
-            updated = True
-
-        if updated:
-            attendance.save()
-            status_text = "present" if attendance_status else "absent"
-            return JsonResponse({
-                'message': f'Attendance updated to {status_text} and flagged as QR-marked.',
-                'class_id': session.class_obj.id,
-                'student_id': student_profile.pk,
-                'status': status_text
-            })
-
-        current_status = "present" if attendance.is_present else "absent"
+    if marked:
         return JsonResponse({
-            'message': f'You have already marked your attendance for this session ({current_status}).',
-            'class_id': session.class_obj.id,
-            'student_id': student_profile.pk,
-            'status': current_status
+            'message': 'Attendance marked as present via QR!',
+            'class_id': entry['class_id'],
+            'student_id': student_id,
+            'status': 'present'
         })
 
-    except Exception as e:
-        return JsonResponse({'error': f'Failed to mark attendance: {str(e)}'}, status=500)
+    return _already_marked_response(entry, student_id)
+
+
+def _already_marked_response(entry, student_id):
+    return JsonResponse({
+        'message': 'You have already marked your attendance for this session (present).',
+        'class_id': entry['class_id'],
+        'student_id': student_id,
+        'status': 'present'
+    })
@@ -2,29 +2,26 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse, HttpResponseForbidden
+from django.utils.dateparse import parse_datetime
+from django.http import FileResponse, HttpResponse, JsonResponse, HttpResponseForbidden, Http404
 from django.urls import reverse
 from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from datetime import timedelta
-import csv
-import segno, io, base64
-from django.core.exceptions import PermissionDenied
+import time
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
 from auth_app.models import StudentProfile, TeacherProfile, User
 from dashboard_app.models import (
     Class, Enrollment, ClassSchedule, ClassSession,
-    SessionAttendance, SessionQRCode
+    SessionAttendance, SessionQRCode, ExportJob
 )
 from dashboard_app.forms import ClassSessionForm, TeacherProfileEditForm
-
-
-def get_client_ip(request):
-    """Get the client's IP address from the request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip or '127.0.0.1'
+from dashboard_app.services import attendance_feed, attendance_summary, csv_export, export_jobs, fragment_cache, network_policy, qr_cache, qr_images, qr_tokens, roster_cache, roster_import, scan_buffer, scan_dedupe, session_reaper, session_roster, teacher_summary, timetable
+from dashboard_app.services.network_policy import get_client_ip
 
 
 def _initials_from_name(name: str):
@@ -44,55 +41,12 @@ def dashboard_teacher(request):
         return redirect('auth:login')
     if request.user.user_type != 'teacher':
         return redirect('dashboard_student:dashboard')
-    # Teacher-specific aggregates for dashboard panels
-    teacher_profile = request.user.teacherprofile
-
-    total_classes = Class.objects.filter(teacher=teacher_profile).count()
-
-    # Count unique students across all classes owned by this teacher
-    total_students = (
-        Enrollment.objects.filter(class_obj__teacher=teacher_profile)
-        .values('student')
-        .distinct()
-        .count()
-    )
-
-    # Today's classes based on schedule day names
-    now = timezone.localtime()
-    current_day = now.strftime('%A')
-
-    todays_qs = (
-        ClassSchedule.objects.filter(class_obj__teacher=teacher_profile, day_of_week=current_day)
-        .select_related('class_obj')
-    )
-
-    # distinct count of class objects that meet today
-    todays_count = todays_qs.values('class_obj').distinct().count()
-
-    # lightweight list for display (code, title, start/end, enrolled count, class id)
-    todays_classes = []
-    class_ids_seen = set()
-    for sched in todays_qs:
-        cid = sched.class_obj.id
-        if cid in class_ids_seen:
-            continue
-        class_ids_seen.add(cid)
-        enrolled_count = Enrollment.objects.filter(class_obj=sched.class_obj).count()
-        todays_classes.append({
-            'id': cid,
-            'code': sched.class_obj.code,
-            'title': sched.class_obj.title,
-            'start_time': sched.start_time,
-            'end_time': sched.end_time,
-            'students': enrolled_count,
-        })
+    # Teacher-specific aggregates for dashboard panels, cached until classes or enrollments change
+    summary = teacher_summary.get(request.user.teacherprofile)
 
     return render(request, "dashboard_app/teacher/dashboard.html", {
         'user_type': 'teacher',
-        'total_classes': total_classes,
-        'total_students': total_students,
-        'todays_count': todays_count,
-        'todays_classes': todays_classes,
+        **summary,
     })
 
 
@@ -153,6 +107,7 @@ def manage_classes(request):
         'user_type': 'teacher',
         'classes': classes,
         'meeting_days': meeting_days,
+        **fragment_cache.context(request.user),
     })
 
 
@@ -292,6 +247,8 @@ def add_class(request):
                 start_time=start,
                 end_time=end
             )
+        teacher_summary.bump(teacher_profile.pk)
+        fragment_cache.bump_users([teacher_profile.pk])
 
         messages.success(request, f"Class '{code}' created successfully.")
         return redirect('dashboard_teacher:manage_classes')
@@ -329,6 +286,8 @@ def edit_class(request, class_id):
             return redirect('dashboard_teacher:manage_classes')
 
         cls.save()
+        teacher_summary.bump(cls.teacher_id)
+        fragment_cache.bump_class(cls)
 
         messages.success(request, f"Class '{cls.code}' updated successfully.")
         return redirect('dashboard_teacher:manage_classes')
@@ -347,7 +306,11 @@ def delete_class(request, class_id):
         if not hasattr(request.user, 'teacherprofile') or cls.teacher != request.user.teacherprofile:
             raise PermissionDenied
         title = cls.title
+        student_ids = roster_cache.student_ids(cls.id)
         cls.delete()
+        roster_cache.invalidate(class_id)
+        teacher_summary.bump(cls.teacher_id)
+        fragment_cache.bump_users({cls.teacher_id, *student_ids})
         messages.success(request, f"Class '{title}' has been deleted.")
         return redirect('dashboard_teacher:manage_classes')
 
@@ -367,10 +330,8 @@ def view_class(request, class_id):
     if class_obj.teacher != teacher_profile:
         raise PermissionDenied
 
-    auto_update_sessions(class_obj)
-
     enrollments = Enrollment.objects.filter(class_obj=class_obj).select_related('student__user').order_by('student__user__last_name', 'student__user__first_name')
-    sessions = ClassSession.objects.filter(class_obj=class_obj).order_by('-date')
+    sessions = ClassSession.objects.filter(class_obj=class_obj).select_related('schedule_day').order_by('-date')
 
     session_form = ClassSessionForm()
     session_form.fields["schedule_day"].queryset = ClassSchedule.objects.filter(class_obj=class_obj)
@@ -382,17 +343,12 @@ def view_class(request, class_id):
     can_create_session = False
     matching_schedule = None
 
-    # Check if there's already an ongoing session
-    has_ongoing_session = ClassSession.objects.filter(class_obj=class_obj, status="ongoing").exists()
+    # Check if there's already an ongoing session; overdue ones are left to the reaper
+    has_ongoing_session = ClassSession.objects.filter(class_obj=class_obj).live().exists()
 
     if not has_ongoing_session:
-        for schedule in class_obj.schedules.all():
-            if schedule.day_of_week == current_day:
-                # Check if current time is within the schedule window
-                if schedule.start_time <= current_time <= schedule.end_time:
-                    can_create_session = True
-                    matching_schedule = schedule
-                    break
+        matching_schedule = timetable.meetings_at(class_obj, now).first()
+        can_create_session = matching_schedule is not None
 
     if request.method == "POST" and "add_student" in request.POST:
         student_email = request.POST.get("student_email", "").strip().lower()
@@ -401,7 +357,12 @@ def view_class(request, class_id):
             if Enrollment.objects.filter(class_obj=class_obj, student=student_profile).exists():
                 messages.warning(request, "Student is already enrolled in this class.")
             else:
-                Enrollment.objects.create(class_obj=class_obj, student=student_profile)
+                with transaction.atomic():
+                    enrollment = Enrollment.objects.create(class_obj=class_obj, student=student_profile)
+                    attendance_summary.recount(Enrollment.objects.filter(pk=enrollment.pk))
+                roster_cache.invalidate(class_obj.id)
+                teacher_summary.bump(class_obj.teacher_id)
+                fragment_cache.bump_class(class_obj)
                 messages.success(request, f"Student '{student_email}' added successfully.")
         except StudentProfile.DoesNotExist:
             messages.error(request, f"No student found with email '{student_email}'.")
@@ -412,6 +373,9 @@ def view_class(request, class_id):
         try:
             enrollment = Enrollment.objects.get(id=enrollment_id, class_obj=class_obj)
             enrollment.delete()
+            roster_cache.invalidate(class_obj.id)
+            teacher_summary.bump(class_obj.teacher_id)
+            fragment_cache.bump_class(class_obj, [enrollment.student_id])
             messages.success(request, "Student removed successfully.")
         except Enrollment.DoesNotExist:
             messages.error(request, "Student not found or already removed.")
@@ -426,16 +390,18 @@ def view_class(request, class_id):
             return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
         session_form = ClassSessionForm(request.POST)
+        # Only a schedule that is meeting right now can start a session
+        session_form.fields["schedule_day"].queryset = timetable.meetings_at(class_obj, now)
         if session_form.is_valid():
             new_session = session_form.save(commit=False)
             new_session.class_obj = class_obj
             new_session.status = "ongoing"
             new_session.teacher_ip = get_client_ip(request)
-            new_session.save()
-
-            enrollments = Enrollment.objects.filter(class_obj=class_obj)
-            for e in enrollments:
-                SessionAttendance.objects.get_or_create(session=new_session, student=e.student)
+            with transaction.atomic():
+                new_session.save()
+                session_roster.materialize(new_session)
+                attendance_summary.session_added(class_obj.id)
+            fragment_cache.bump_class(class_obj)
 
             messages.success(request, "Class session created successfully.")
             return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
@@ -460,6 +426,7 @@ def view_class(request, class_id):
         'current_day': current_day,
         'current_time': current_time,
         'session_creation_reason': session_creation_reason,
+        **fragment_cache.context(request.user),
     })
 
 
@@ -468,66 +435,91 @@ def view_class(request, class_id):
 # ==============================
 @login_required
 def export_enrolled_students(request, class_id):
-    class_obj = Class.objects.get(id=class_id)
-    enrollments = Enrollment.objects.filter(class_obj=class_obj)
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{class_obj.code}_enrolled_students.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Full Name', 'Email'])
+    if request.user.user_type != 'teacher':
+        return redirect('dashboard_student:dashboard')
 
-    for enrollment in enrollments:
-        user = enrollment.student.user
-        full_name = f"{user.first_name} {user.last_name}".strip()
-        if not full_name:
-            full_name = user.username or user.email
-        writer.writerow([full_name, user.email])
+    class_obj = get_object_or_404(Class, id=class_id)
+    if class_obj.teacher_id != request.user.teacherprofile.pk:
+        raise PermissionDenied
 
-    return response
+    return csv_export.csv_response(
+        csv_export.enrolled_student_rows(class_obj), csv_export.enrolled_students_filename(class_obj),
+        compress=request.GET.get('gzip') == '1',
+    )
 
 
 @login_required
 def export_session_attendance(request, class_id, session_id):
+    if request.user.user_type != 'teacher':
+        return redirect('dashboard_student:dashboard')
+
     class_obj = get_object_or_404(Class, id=class_id)
+    if class_obj.teacher_id != request.user.teacherprofile.pk:
+        raise PermissionDenied
     session = get_object_or_404(ClassSession, id=session_id, class_obj=class_obj)
-    attendances = SessionAttendance.objects.filter(session=session).select_related('student__user')
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{class_obj.code}_{session.date}_attendance.csv"'
+    return csv_export.csv_response(
+        csv_export.session_attendance_rows(class_obj, session), csv_export.session_attendance_filename(class_obj, session),
+        compress=request.GET.get('gzip') == '1',
+    )
 
-    writer = csv.writer(response)
 
-    schedules = ClassSchedule.objects.filter(class_obj=class_obj)
-    schedule_text = "; ".join([
-        f"{s.day_of_week} ({s.start_time.strftime('%I:%M %p')} - {s.end_time.strftime('%I:%M %p')})"
-        for s in schedules
-    ])
+@login_required
+def export_class_attendance(request, class_id):
+    if request.user.user_type != 'teacher':
+        return redirect('dashboard_student:dashboard')
+
+    class_obj = get_object_or_404(Class, id=class_id)
+    if class_obj.teacher_id != request.user.teacherprofile.pk:
+        raise PermissionDenied
 
-    writer.writerow(['Class Name', 'Section', 'Class Schedule', 'Date'])
-    writer.writerow([class_obj.title, class_obj.section, schedule_text, session.date.strftime("%B %d, %Y")])
-    writer.writerow([])
-    writer.writerow(['Attendance', '', '', ''])
-    writer.writerow([])
+    return csv_export.csv_response(
+        csv_export.class_attendance_rows(class_obj), csv_export.class_attendance_filename(class_obj),
+        compress=request.GET.get('gzip') == '1',
+    )
 
-    writer.writerow(['Full Name', 'Email', 'Status', '', ''])
 
-    for attendance in attendances:
-        user = attendance.student.user
-        full_name = f"{user.first_name} {user.last_name}".strip()
-        if not full_name:
-            full_name = user.username or user.email
+@login_required
+def start_export(request):
+    """Queue a background export of every class (optionally one academic year) as a zip of CSVs."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    if request.user.user_type != 'teacher':
+        return JsonResponse({'error': 'Only teachers can export attendance'}, status=403)
 
-        if attendance.is_present is True:
-            status = "Present"
-        elif attendance.is_present is False:
-            status = "Absent"
-        else:
-            status = "Not Marked"
+    job = export_jobs.start(request.user.teacherprofile, request.POST.get('academic_year', '').strip())
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'status_url': reverse('dashboard_teacher:export_status', args=[job.id]),
+    })
 
-        writer.writerow([full_name, user.email, status, '', ''])
 
-    return response
+@login_required
+def export_status(request, job_id):
+    """Polling endpoint for an export job's progress."""
+    if request.user.user_type != 'teacher':
+        return JsonResponse({'error': 'Only teachers can export attendance'}, status=403)
+
+    job = get_object_or_404(ExportJob, id=job_id, teacher=request.user.teacherprofile)
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'download_url': reverse('dashboard_teacher:download_export', args=[job.id]) if job.status == 'done' else None,
+        'error': job.error or None,
+    })
+
+
+@login_required
+def download_export(request, job_id):
+    if request.user.user_type != 'teacher':
+        return redirect('dashboard_student:dashboard')
+
+    job = get_object_or_404(ExportJob, id=job_id, teacher=request.user.teacherprofile)
+    if job.status != 'done' or not job.file:
+        raise Http404("Export is not ready")
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
 
 
 # ==============================
@@ -538,7 +530,7 @@ def create_session(request, class_id):
     class_obj = get_object_or_404(Class, id=class_id)
     if request.method == 'POST':
         # Check if there's already an ongoing session
-        if ClassSession.objects.filter(class_obj=class_obj, status="ongoing").exists():
+        if ClassSession.objects.filter(class_obj=class_obj).live().exists():
             messages.error(request, "Cannot create a new session. There is already an ongoing session for this class.")
             return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
@@ -547,17 +539,28 @@ def create_session(request, class_id):
             messages.error(request, "Please select a schedule day.")
             return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
-        session = ClassSession.objects.create(
-            class_obj=class_obj,
-            schedule_day_id=schedule_day_id,
-            date=timezone.now().date(),
-            status="ongoing",
-            teacher_ip=get_client_ip(request)
-        )
+        if not schedule_day_id.isdigit() or not timetable.meetings_at(class_obj).filter(id=schedule_day_id).exists():
+            messages.error(request, "Cannot create session. Current time does not match the selected class schedule.")
+            return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
-        enrollments = Enrollment.objects.filter(class_obj=class_obj)
-        for e in enrollments:
-            SessionAttendance.objects.get_or_create(session=session, student=e.student)
+        try:
+            allowed_networks = network_policy.normalize_networks(request.POST.get('allowed_networks', ''))
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
+
+        with transaction.atomic():
+            session = ClassSession.objects.create(
+                class_obj=class_obj,
+                schedule_day_id=schedule_day_id,
+                date=timezone.now().date(),
+                status="ongoing",
+                teacher_ip=get_client_ip(request),
+                allowed_networks=allowed_networks,
+            )
+            session_roster.materialize(session)
+            attendance_summary.session_added(class_obj.id)
+        fragment_cache.bump_class(class_obj)
 
         messages.success(request, "Session created successfully!")
         return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
@@ -572,7 +575,14 @@ def create_session(request, class_id):
 def delete_session(request, session_id):
     session = get_object_or_404(ClassSession, id=session_id)
     cid = session.class_obj.id
-    session.delete()
+    with transaction.atomic():
+        session.delete()
+        attendance_summary.recount_class(cid)
+    fragment_cache.bump_class(session.class_obj)
+    qr_cache.invalidate_session(session_id)
+    scan_dedupe.clear(session_id)
+    # Buffered scans for the session would now fail on the foreign key
+    scan_buffer.discard(session_id)
     messages.success(request, "Session deleted successfully!")
     return redirect('dashboard_teacher:view_class', class_id=cid)
 
@@ -584,12 +594,6 @@ def delete_session(request, session_id):
 def view_session(request, class_id, session_id):
     session = get_object_or_404(ClassSession, id=session_id, class_obj_id=class_id)
     class_obj = session.class_obj
-    enrollments = Enrollment.objects.filter(class_obj=class_obj).select_related('student__user').order_by('student__user__first_name', 'student__user__last_name')
-
-    for enrollment in enrollments:
-        SessionAttendance.objects.get_or_create(session=session, student=enrollment.student)
-
-    attendances = SessionAttendance.objects.filter(session=session).select_related('student__user').order_by('student__user__first_name', 'student__user__last_name')
 
     now = timezone.now()
     active_qr = False
@@ -609,33 +613,114 @@ def view_session(request, class_id, session_id):
             messages.error(request, "Cannot modify attendance. This session has already ended.")
             return redirect('dashboard_teacher:view_session', class_id=class_id, session_id=session.id)
 
-        success_count = 0
-        for attendance in attendances:
-            status = request.POST.get(f'status_{attendance.student.pk}')
-            if status not in ['present', 'absent']:
-                continue
-
-            attendance.is_present = (status == 'present')
-            if not attendance.timestamp:
-                attendance.timestamp = timezone.now()
-            attendance.save()
-            success_count += 1
+        # Students enrolled after the session started only have virtual rows until now
+        session_roster.materialize(session)
+
+        submitted = {True: [], False: []}
+        for key, status in request.POST.items():
+            student_id = key[len('status_'):]
+            if key.startswith('status_') and student_id.isdigit() and status in ['present', 'absent']:
+                submitted[status == 'present'].append(int(student_id))
+
+        # One UPDATE per target status, touching only rows whose status differs,
+        # so the returned row counts are the real number of changes
+        now = timezone.now()
+        changed = {}
+        with transaction.atomic():
+            # Prior marks, locked until commit, give each change's exact counter delta
+            prior = dict(
+                SessionAttendance.objects.select_for_update()
+                .filter(session=session, student_id__in=submitted[True] + submitted[False])
+                .values_list('student_id', 'is_present')
+            )
+            for is_present, student_ids in submitted.items():
+                if not student_ids:
+                    continue
+                changed[is_present] = (
+                    SessionAttendance.objects
+                    .filter(session=session, student_id__in=student_ids)
+                    .exclude(is_present=is_present)
+                    .update(
+                        is_present=is_present,
+                        timestamp=Coalesce('timestamp', Value(now)),
+                        updated_at=now,
+                    )
+                )
+            success_count = sum(changed.values())
+            attendance_summary.marks_changed(session.id, {
+                student_id: (prior[student_id], is_present)
+                for is_present, student_ids in submitted.items()
+                for student_id in student_ids
+                if student_id in prior and prior[student_id] != is_present
+            })
 
         if success_count > 0:
+            if changed.get(False):
+                # Students marked absent may still be listed in the dedupe cache
+                scan_dedupe.clear(session.id)
+            attendance_feed.bump(session.id)
+            fragment_cache.bump_users(submitted[True] + submitted[False])
             messages.success(request, f"{success_count} attendance record(s) saved successfully!")
         else:
             messages.info(request, "No attendance changes detected.")
 
         return redirect('dashboard_teacher:view_session', class_id=class_id, session_id=session.id)
 
+    # Taken before the roster is read so the live feed never skips a change
+    feed_cursor = timezone.now()
+    attendances = session_roster.attendance_rows(session)
+
     return render(request, 'dashboard_app/teacher/view_session.html', {
         'user_type': 'teacher',
         'session': session,
         'class_obj': class_obj,
         'class_id': class_id,
-        'enrollments': enrollments,
         'attendances': attendances,
         'qr_active': active_qr,
+        'feed_cursor': feed_cursor.isoformat(),
+        'feed_wait': settings.ATTENDANCE_FEED_MAX_WAIT,
+        'feed_poll_ms': settings.ATTENDANCE_FEED_POLL_SECONDS * 1000,
+    })
+
+
+@login_required
+def attendance_changes(request, class_id, session_id):
+    """
+    Feed of SessionAttendance rows changed after the `since` cursor.
+
+    Answers immediately by default. Only when ATTENDANCE_FEED_MAX_WAIT is
+    raised (threaded/async deployments) does an empty poll wait up to `wait`
+    seconds, watching the session's change version in the cache and only
+    querying when it moves.
+    """
+    session = get_object_or_404(ClassSession.objects.select_related('class_obj'), id=session_id, class_obj_id=class_id)
+    if not hasattr(request.user, 'teacherprofile') or session.class_obj.teacher_id != request.user.pk:
+        return HttpResponseForbidden('Not allowed')
+
+    since = parse_datetime(request.GET.get('since', ''))
+    if since is None:
+        return JsonResponse({'error': 'A valid "since" cursor is required.'}, status=400)
+
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0
+    wait = max(0, min(wait, settings.ATTENDANCE_FEED_MAX_WAIT))
+    deadline = time.monotonic() + wait
+
+    seen_version = attendance_feed.version(session.id)
+    changes, cursor = attendance_feed.changes_since(session.id, since)
+    while not changes and time.monotonic() < deadline:
+        time.sleep(0.5)
+        current_version = attendance_feed.version(session.id)
+        if current_version != seen_version or time.monotonic() >= deadline:
+            seen_version = current_version
+            changes, cursor = attendance_feed.changes_since(session.id, since)
+
+    return JsonResponse({
+        'cursor': cursor.isoformat(),
+        'changes': changes,
+        'session_status': session.status,
     })
 
 
@@ -671,21 +756,54 @@ def generate_qr(request, class_id, session_id):
             qr.expires_at = expires_at
             qr.save(update_fields=['qr_active', 'expires_at'])
 
-    scan_url = request.build_absolute_uri(reverse('dashboard_student:mark_attendance', args=[qr.code]))
+    qr_cache.store(qr)
 
-    qr_img = segno.make(scan_url)
-    buffer = io.BytesIO()
-    qr_img.save(buffer, kind='png', scale=5)
-    qr_data_uri = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+    # In token mode the QR carries a short-lived signed token instead of the stored code
+    scan_code = qr_tokens.make_token(session.id) if qr_tokens.enabled() else qr.code
+    scan_url = request.build_absolute_uri(reverse('dashboard_student:mark_attendance', args=[scan_code]))
+    qr_image_url = reverse('dashboard_teacher:qr_image', args=[class_id, session.id, scan_code])
 
     return JsonResponse({
         'code': qr.code,
         'expires_at': qr.expires_at.isoformat(),
-        'qr_image': qr_data_uri,
+        'qr_image_url': qr_image_url,
         'scan_url': scan_url,
+        'rotate_seconds': qr_tokens.rotate_seconds() if qr_tokens.enabled() else None,
     })
 
 
+@login_required
+def qr_image(request, class_id, session_id, qr_code):
+    """Serve the QR image for a scan code as SVG (default) or PNG, with a strong ETag."""
+    owned_sessions = ClassSession.objects.filter(
+        id=session_id, class_obj_id=class_id, class_obj__teacher_id=request.user.pk
+    )
+    if qr_tokens.is_token(qr_code):
+        try:
+            valid = qr_tokens.verify_token(qr_code) == session_id
+        except signing.BadSignature:
+            valid = False
+        valid = valid and owned_sessions.exists()
+    else:
+        valid = SessionQRCode.objects.filter(code=qr_code, session__in=owned_sessions).exists()
+
+    if not valid:
+        raise Http404
+
+    kind = 'png' if request.GET.get('format') == 'png' else 'svg'
+    scan_url = request.build_absolute_uri(reverse('dashboard_student:mark_attendance', args=[qr_code]))
+    etag = qr_images.etag(scan_url, kind)
+
+    # Handles weak and multi-valued If-None-Match (and '*') like Django's conditional views
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(qr_images.render(scan_url, kind), content_type=qr_images.CONTENT_TYPES[kind])
+    response['ETag'] = etag
+    # A given scan URL always renders the same image, so browsers may keep it
+    patch_cache_control(response, private=True, max_age=86400, immutable=True)
+    return response
+
+
 @login_required
 def end_qr(request, class_id, session_id):
     if request.method != 'POST':
@@ -704,39 +822,10 @@ def end_qr(request, class_id, session_id):
     qr.expires_at = now
     qr.qr_active = False
     qr.save(update_fields=['expires_at', 'qr_active'])
+    qr_cache.invalidate_session(session.id)
     return JsonResponse({'ok': True, 'message': 'QR ended.'})
 
 
-def auto_update_sessions(class_obj):
-    now = timezone.localtime()
-    today = now.date()
-    current_time = now.time()
-
-    sessions = (
-        ClassSession.objects
-        .filter(class_obj=class_obj, status="ongoing")
-        .select_related("schedule_day")
-    )
-
-    for session in sessions:
-        schedule = session.schedule_day
-
-        should_end = (
-            (session.date == today and current_time > schedule.end_time) or
-            (session.date < today)
-        )
-
-        if should_end:
-            with transaction.atomic():
-                session.status = "completed"
-                session.save(update_fields=["status"])
-
-                SessionAttendance.objects.filter(
-                    session=session,
-                    is_present__isnull=True
-                ).update(is_present=False)
-
-
 # UPLOAD STUDENTS CSV
 @login_required
 def upload_students_csv(request, class_id):
@@ -760,41 +849,16 @@ def upload_students_csv(request, class_id):
         messages.error(request, 'File must be a CSV.')
         return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
-    file_data = csv_file.read().decode('utf-8')
-    csv_reader = csv.reader(io.StringIO(file_data))
-
-    header = next(csv_reader, None)
-
-    enrolled = 0
-    skipped = 0
-    invalid_emails = []
-
-    for row_num, row in enumerate(csv_reader, start=2):
-        for col_num, cell in enumerate(row, start=1):
-            cell = cell.strip()
-            if '@' in cell:
-                if not cell:
-                    invalid_emails.append(f"Row {row_num}, Column {col_num}: Empty email")
-                    continue
-                if cell.count('@') != 1 or '.' not in cell.split('@')[1]:
-                    invalid_emails.append(f"Row {row_num}, Column {col_num}: Invalid email format '{cell}'")
-                    continue
-                email = cell.lower()
-
-                try:
-                    student_profile = StudentProfile.objects.get(user__email=email)
-                except StudentProfile.DoesNotExist:
-                    invalid_emails.append(f"'{cell}' is not registered as a student")
-                    continue
-
-                if Enrollment.objects.filter(class_obj=class_obj, student=student_profile).exists():
-                    skipped += 1
-                    continue
-
-                Enrollment.objects.create(class_obj=class_obj, student=student_profile)
-                enrolled += 1
+    try:
+        enrolled, skipped, invalid_emails = roster_import.import_enrollments(class_obj, csv_file)
+    except UnicodeDecodeError:
+        messages.error(request, 'File must be UTF-8 encoded.')
+        return redirect('dashboard_teacher:view_class', class_id=class_obj.id)
 
     if enrolled > 0:
+        roster_cache.invalidate(class_obj.id)
+        teacher_summary.bump(class_obj.teacher_id)
+        fragment_cache.bump_class(class_obj)
         messages.success(request, f"{enrolled} student{'s' if enrolled != 1 else ''} enrolled.")
     if skipped > 0:
         messages.info(request, f"{skipped} student{'s' if skipped != 1 else ''} skipped (already enrolled).")
@@ -822,10 +886,7 @@ def end_session(request, class_id, session_id):
         messages.info(request, 'Session has already ended.')
         return redirect('dashboard_teacher:view_session', class_id=class_id, session_id=session.id)
 
-    with transaction.atomic():
-        session.status = 'completed'
-        session.save(update_fields=['status'])
-        SessionAttendance.objects.filter(session=session, is_present__isnull=True).update(is_present=False)
+    session_reaper.close_sessions([session.id])
 
     messages.success(request, 'Session ended. All unmarked students were marked absent.')
     return redirect('dashboard_teacher:view_session', class_id=class_id, session_id=session.id)